@@ -0,0 +1,98 @@
+"""
+Gunicorn Configuration
+
+Gunicorn loads this module from the working directory. Every setting can
+be changed with an environment variable:
+
+    PORT                     port to listen on (8080)
+    GUNICORN_WORKERS         worker processes (from the CPU quota)
+    GUNICORN_WORKER_CLASS    sync, gthread or gevent (gthread)
+    GUNICORN_THREADS         threads per gthread worker (4)
+    GUNICORN_PRELOAD         import the app once before forking (true)
+    GUNICORN_MAX_REQUESTS    requests before a worker is recycled (1000, 0 to never)
+    GUNICORN_MAX_REQUESTS_JITTER  random extra requests so workers do not recycle together (100)
+    GUNICORN_TIMEOUT         seconds a silent worker lives (30)
+    GUNICORN_KEEPALIVE       seconds to wait for the next request on a connection (5)
+
+Keep the threads of a worker within its connection pool, DATABASE_POOL_SIZE
+plus DATABASE_MAX_OVERFLOW, so no thread waits for a connection.
+"""
+import math
+import os
+import tempfile
+
+CGROUP_ROOT = "/sys/fs/cgroup"
+
+
+def cpu_limit(cgroup_root=CGROUP_ROOT):
+    """Returns the CPUs this process may use, honoring the cgroup CPU quota of its container"""
+    quota_files = (
+        (os.path.join(cgroup_root, "cpu.max"),),  # cgroup v2 holds "quota period"
+        (os.path.join(cgroup_root, "cpu", "cpu.cfs_quota_us"),
+         os.path.join(cgroup_root, "cpu", "cpu.cfs_period_us")),  # cgroup v1
+    )
+    for paths in quota_files:
+        try:
+            values = " ".join(_read(path) for path in paths).split()
+            quota, period = int(values[0]), int(values[1])
+        except (OSError, ValueError, IndexError):
+            continue
+        if quota > 0 and period > 0:
+            return max(1, math.ceil(quota / period))
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def _read(path):
+    with open(path, encoding="ascii") as file:
+        return file.read()
+
+
+def _flag(name, default):
+    return os.getenv(name, default).lower() in ("true", "1", "yes")
+
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8080')}"
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
+# threads and greenlets wait on the database for a sync worker's extra processes
+workers = int(os.getenv("GUNICORN_WORKERS", "0")) or (
+    cpu_limit() * 2 + 1 if worker_class == "sync" else cpu_limit()
+)
+preload_app = _flag("GUNICORN_PRELOAD", "true")
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "1000"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "100"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "30"))
+graceful_timeout = timeout
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+loglevel = os.getenv("GUNICORN_LOG_LEVEL", "info")
+
+# the workers share their Prometheus samples through files in this folder
+if workers > 1 and not os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="prometheus-")
+
+
+def post_fork(server, worker):  # pylint: disable=unused-argument
+    """Gives a worker forked from a preloaded app its own connections and log thread"""
+    if worker_class == "gevent":
+        try:
+            from psycogreen.gevent import patch_psycopg  # pylint: disable=import-outside-toplevel
+            patch_psycopg()
+        except ImportError:
+            server.log.warning("psycogreen is missing, database calls will block gevent workers")
+    app = server.app.callable
+    if app is None:
+        return  # the app is built after the fork when it is not preloaded
+    # pylint: disable=import-outside-toplevel
+    from service.common.log_handlers import restart_logging
+    from service.models import dispose_after_fork
+    dispose_after_fork(app)
+    restart_logging(app)
+
+
+def child_exit(server, worker):  # pylint: disable=unused-argument
+    """Drops the Prometheus live gauges of a worker that exited"""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess  # pylint: disable=import-outside-toplevel
+        multiprocess.mark_process_dead(worker.pid)
@@ -2,44 +2,54 @@
 Package: service
 Package for the application models and service routes
 This module creates and configures the Flask app and sets up the logging
-and SQL database
+and SQL database. The app is built by create_app(), which never connects
+to the database: the engine connects on the first request and the tables
+are made by the flask db-init command.
 """
-import sys
+import time
 from flask import Flask
 from flask_talisman import Talisman
 from flask_cors import CORS
-from service import config
-from service.common import log_handlers
+from service import config, models, routes
+from service.common import (
+    access_log, cli_commands, error_handlers, health, json_codec, log_handlers, metrics, query_log
+)
 
-# Create Flask application
-app = Flask(__name__)
-app.config.from_object(config)
+talisman = Talisman()
+cors = CORS()
 
-talisman = Talisman(app)
-CORS(app)
 
-# talisman.force_https = False
+def create_app(config_object=config):
+    """Creates and configures the Flask app"""
+    started = time.perf_counter()
+    app = Flask(__name__)
+    app.config.from_object(config_object)
+    json_codec.init_json(app)
 
+    talisman.init_app(app)
+    cors.init_app(app)
+    # talisman.force_https = False
 
-# Import the routes After the Flask app is created
-# pylint: disable=wrong-import-position, cyclic-import, wrong-import-order
-from service import routes, models  # noqa: F401 E402
+    app.register_blueprint(routes.api)
+    app.register_blueprint(error_handlers.errors)
+    app.register_blueprint(cli_commands.commands)
 
-# pylint: disable=wrong-import-position
-from service.common import error_handlers, cli_commands  # noqa: F401 E402
+    # Set up logging for production
+    log_handlers.init_logging(app, "gunicorn.error")
 
-# Set up logging for production
-log_handlers.init_logging(app, "gunicorn.error")
+    # Time SQL statements, record Prometheus metrics and log every request
+    query_log.init_query_log(app)
+    metrics.init_metrics(app)
+    access_log.init_access_log(app)
 
-app.logger.info(70 * "*")
-app.logger.info("  A C C O U N T   S E R V I C E   R U N N I N G  ".center(70, "*"))
-app.logger.info(70 * "*")
+    app.logger.info(70 * "*")
+    app.logger.info("  A C C O U N T   S E R V I C E   R U N N I N G  ".center(70, "*"))
+    app.logger.info(70 * "*")
 
-try:
-    models.init_db(app)  # make our database tables
-except Exception as error:  # pylint: disable=broad-except
-    app.logger.critical("%s: Cannot continue", error)
-    # gunicorn requires exit code 4 to stop spawning workers when they die
-    sys.exit(4)
+    models.init_db(app)  # the engine connects on first use
+    health.init_health(app)
 
-app.logger.info("Service initialized!")
+    elapsed = time.perf_counter() - started
+    metrics.STARTUP_SECONDS.set(elapsed)
+    app.logger.info("Service initialized in %.1f ms", elapsed * 1000)
+    return app
@@ -0,0 +1,364 @@
+"""
+ASGI Account Service
+
+This module serves the Account endpoints as an ASGI application on an
+async SQLAlchemy engine with asyncpg. A request waiting on Postgres does
+not pin a thread, so a single worker can hold hundreds of them in flight.
+Run it with any ASGI server, for example:
+
+    uvicorn service.asgi:app --host 0.0.0.0 --port 8080
+
+The health, list, multi-get, create, read, update, patch and delete
+endpoints share their validation, versions, ETags and cache with the
+WSGI routes. The batch, streaming and export endpoints are only served
+by the WSGI application.
+"""
+import asyncio
+import json
+import logging
+import os
+import re
+from urllib.parse import parse_qsl, urlencode
+from flask import Config
+from sqlalchemy import insert, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import create_async_engine
+from werkzeug.datastructures import MultiDict
+from werkzeug.exceptions import (
+    BadRequest, Conflict, HTTPException, MethodNotAllowed, NotFound, PreconditionFailed,
+    UnsupportedMediaType,
+)
+from werkzeug.http import parse_etags, quote_etag
+from service import config as default_config
+from service.common import json_codec, status
+from service.common.cache import RedisCache, create_cache
+from service.common.error_handlers import UNIQUE_VIOLATION
+from service.models import MAX_INTEGER, READABLE_COLUMNS, Account, DataValidationError
+from service.routes import (
+    account_etag, decode_cursor, found_and_missing, get_account_query, get_fields, get_id_list,
+    get_if_match_versions, get_page_size, next_page, page_etag, select_fields,
+)
+
+logger = logging.getLogger("flask.app")
+
+TABLE = Account.__table__
+
+# The headers Talisman and CORS add to the responses of the WSGI service
+DEFAULT_HEADERS = {
+    "Access-Control-Allow-Origin": "*",
+    "Content-Security-Policy": "default-src 'self'",
+    "Referrer-Policy": "strict-origin-when-cross-origin",
+    "X-Content-Type-Options": "nosniff",
+    "X-Frame-Options": "SAMEORIGIN",
+}
+
+
+######################################################################
+#  R E Q U E S T   A N D   R E S P O N S E
+######################################################################
+class Request:
+    """The parts of an ASGI HTTP request that the endpoints read"""
+
+    def __init__(self, scope, body=b""):
+        self.method = scope["method"]
+        self.path = scope["path"]
+        query_string = scope.get("query_string", b"").decode("latin-1")
+        self.args = MultiDict(parse_qsl(query_string, keep_blank_values=True))
+        self.headers = {
+            name.decode("latin-1").lower(): value.decode("latin-1")
+            for name, value in scope.get("headers", [])
+        }
+        self.scheme = scope.get("scheme", "http")
+        self.body = body
+
+    @property
+    def if_match(self):
+        """Returns the entity tags of the If-Match header"""
+        return parse_etags(self.headers.get("if-match"))
+
+    @property
+    def if_none_match(self):
+        """Returns the entity tags of the If-None-Match header"""
+        return parse_etags(self.headers.get("if-none-match"))
+
+    def get_json(self, *media_types):
+        """Returns the JSON body after checking its media type is one of media_types"""
+        content_type = self.headers.get("content-type", "").split(";")[0].strip()
+        if content_type not in media_types:
+            raise UnsupportedMediaType(f"Content-Type must be {' or '.join(media_types)}")
+        try:
+            return json.loads(self.body)
+        except ValueError as error:
+            raise BadRequest(f"Invalid JSON: {error}") from error
+
+    def url(self, path):
+        """Returns the absolute URL of path on this server"""
+        return f"{self.scheme}://{self.headers.get('host', 'localhost')}{path}"
+
+
+class Response:
+    """An HTTP response that is sent over ASGI"""
+
+    def __init__(self, body=b"", status_code=status.HTTP_200_OK, headers=None):
+        self.body = body
+        self.status_code = status_code
+        self.headers = dict(DEFAULT_HEADERS, **(headers or {}))
+
+    @classmethod
+    def json(cls, data, status_code=status.HTTP_200_OK, headers=None):
+        """Returns a response with data encoded as JSON"""
+        headers = dict(headers or {}, **{"Content-Type": "application/json"})
+        return cls(json_codec.dumps(data), status_code, headers)
+
+    async def send(self, send):
+        """Sends the response through the ASGI send callable"""
+        headers = [(name.lower().encode("latin-1"), str(value).encode("latin-1"))
+                   for name, value in self.headers.items()]
+        headers.append((b"content-length", str(len(self.body)).encode("latin-1")))
+        await send({"type": "http.response.start", "status": self.status_code, "headers": headers})
+        await send({"type": "http.response.body", "body": self.body})
+
+
+######################################################################
+#  A C C O U N T   S E R V I C E
+######################################################################
+class AccountService:
+    """
+    The ASGI application
+
+    The async engine and the cache are created on the first request or at
+    lifespan startup, and the engine is disposed of at lifespan shutdown.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.engine = None
+        self.cache = None
+        self.routes = [
+            (re.compile(r"/health"), {"GET": self.health}),
+            (re.compile(r"/accounts"), {"GET": self.list_accounts, "POST": self.create_account}),
+            (re.compile(r"/accounts/(\d+)"), {
+                "GET": self.read_account,
+                "PUT": self.update_account,
+                "PATCH": self.patch_account,
+                "DELETE": self.delete_account,
+            }),
+        ]
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self.lifespan(receive, send)
+        elif scope["type"] == "http":
+            body = b""
+            more_body = True
+            while more_body:
+                message = await receive()
+                body += message.get("body", b"")
+                more_body = message.get("more_body", False)
+            response = await self.dispatch(Request(scope, body))
+            await response.send(send)
+
+    async def lifespan(self, receive, send):
+        """Opens the engine at startup and closes it at shutdown"""
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                self.connect()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.dispose()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    def connect(self):
+        """Creates the async engine on the configured database and the cache"""
+        if self.engine is not None:
+            return
+        url = make_url(self.config["SQLALCHEMY_DATABASE_URI"]).set(drivername="postgresql+asyncpg")
+        options = {
+            name: value for name, value in self.config.get("SQLALCHEMY_ENGINE_OPTIONS", {}).items()
+            if name != "poolclass"
+        }
+        self.engine = create_async_engine(url, **options)
+        self.cache = create_cache(self.config)
+
+    async def dispose(self):
+        """Closes every connection of the async engine"""
+        if self.engine is not None:
+            await self.engine.dispose()
+            self.engine = None
+
+    async def dispatch(self, request):
+        """Runs the endpoint that matches the request and turns errors into responses"""
+        try:
+            for pattern, methods in self.routes:
+                match = pattern.fullmatch(request.path)
+                if match:
+                    if request.method not in methods:
+                        raise MethodNotAllowed(list(methods))
+                    self.connect()
+                    account_ids = [int(value) for value in match.groups()]
+                    # no Account has an ID beyond the integer column, and asyncpg can not bind it
+                    if any(account_id > MAX_INTEGER for account_id in account_ids):
+                        raise NotFound(f"Account with ID {account_ids[0]} could not be found")
+                    return await methods[request.method](request, *account_ids)
+            raise NotFound(f"{request.path} was not found on this server")
+        except DataValidationError as error:
+            return self.error_response(BadRequest(str(error)))
+        except HTTPException as error:
+            return self.error_response(error)
+        except Exception:  # pylint: disable=broad-except
+            logger.exception("Internal Server Error")
+            return Response.json({
+                "status": status.HTTP_500_INTERNAL_SERVER_ERROR,
+                "error": "Internal Server Error",
+                "message": "The server could not handle the request",
+            }, status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    @staticmethod
+    def error_response(error):
+        """Returns the JSON error body the WSGI error handlers return"""
+        logger.warning(error.description)
+        headers = dict(error.get_headers())
+        headers.pop("Content-Type", None)
+        body = {"status": error.code, "error": error.name, "message": error.description}
+        return Response.json(body, error.code, headers)
+
+    ##################################################################
+    #  D A T A B A S E   A N D   C A C H E
+    ##################################################################
+    async def fetch_all(self, statement):
+        """Returns every row of a read-only statement"""
+        async with self.engine.connect() as conn:
+            return (await conn.execute(statement)).all()
+
+    async def execute(self, statement):
+        """Runs a write statement in its own transaction and returns the first row"""
+        try:
+            async with self.engine.begin() as conn:
+                return (await conn.execute(statement)).first()
+        except IntegrityError as error:
+            # the detail of the error holds the conflicting values, so it is only logged
+            if getattr(error.orig, "pgcode", None) != UNIQUE_VIOLATION:
+                raise
+            logger.warning("Unique violation: %s", error.orig)
+            raise Conflict("A record with the same unique values already exists") from error
+
+    async def cache_call(self, method, *args):
+        """Calls a cache method, off the event loop when it goes over the network"""
+        if isinstance(self.cache, RedisCache):
+            return await asyncio.to_thread(method, *args)
+        return method(*args)
+
+    async def find_values(self, account_id):
+        """Finds the serialized fields and version of an Account like Account.find_values"""
+        key = Account.cache_key(account_id)
+        data = await self.cache_call(self.cache.get, key)
+        if data is None:
+            columns = [TABLE.c[name] for name in READABLE_COLUMNS + ("version",)]
+            rows = await self.fetch_all(select(*columns).where(TABLE.c.id == account_id))
+            if not rows:
+                return None
+            data = Account.serialize_row(rows[0])
+            await self.cache_call(self.cache.set, key, data)
+        return data
+
+    async def write(self, account_id, statement, versions):
+        """Runs an UPDATE or DELETE of an Account, invalidates it and explains a miss"""
+        row = await self.execute(statement)
+        await self.cache_call(self.cache.delete, Account.cache_key(account_id))
+        if row is None:
+            if versions is not None and await self.find_values(account_id):
+                raise PreconditionFailed(f"Account with ID {account_id} was modified")
+            raise NotFound(f"Account with ID {account_id} is not found")
+        return row
+
+    ##################################################################
+    #  E N D P O I N T S
+    ##################################################################
+    async def health(self, request):  # pylint: disable=unused-argument
+        """Lets the orchestrator know the service is up"""
+        return Response.json({"status": "OK"})
+
+    async def list_accounts(self, request):
+        """Returns one page of Accounts, or the Accounts with the IDs in ?id="""
+        fields = get_fields(request.args)
+        if "id" in request.args:
+            ids = get_id_list(request.args, self.config)
+            columns = [TABLE.c[name] for name in dict.fromkeys(("id",) + fields)]
+            rows = await self.fetch_all(select(*columns).where(Account.id_in(ids)))
+            return Response.json(found_and_missing(ids, rows, fields))
+
+        limit = get_page_size(request.args, self.config)
+        after_id = decode_cursor(request.args.get("cursor"))
+        columns = [TABLE.c[name] for name in dict.fromkeys(("id", "version") + fields)]
+        statement = get_account_query(select(*columns), request.args)
+        if after_id is not None:
+            statement = statement.where(TABLE.c.id > after_id)
+        # fetch one extra row to find out if there is a next page
+        rows = await self.fetch_all(statement.order_by(TABLE.c.id).limit(limit + 1))
+        rows, headers = next_page(
+            rows, limit, request.args, lambda args: f"{request.path}?{urlencode(args)}"
+        )
+        return self.conditional_response(
+            request, page_etag(rows, fields), lambda: [select_fields(row, fields) for row in rows],
+            headers,
+        )
+
+    async def create_account(self, request):
+        """Creates an Account from the posted JSON"""
+        account = Account().deserialize(request.get_json("application/json"))
+        statement = insert(TABLE).values(**account.column_values()).returning(*TABLE.c)
+        row = await self.execute(statement)
+        headers = {"Location": request.url(f"/accounts/{row.id}")}
+        return Response.json(select_fields(row, READABLE_COLUMNS), status.HTTP_201_CREATED, headers)
+
+    async def read_account(self, request, account_id):
+        """Returns the Account with the given ID"""
+        fields = get_fields(request.args)
+        values = await self.find_values(account_id)
+        if values is None:
+            raise NotFound(f"Account with ID {account_id} could not be found")
+        return self.conditional_response(
+            request, account_etag(values, fields), lambda: select_fields(values, fields)
+        )
+
+    async def update_account(self, request, account_id):
+        """Replaces the Account with the given ID, honoring If-Match"""
+        versions = get_if_match_versions(account_id, request.if_match)
+        account = Account().deserialize(request.get_json("application/json"))
+        statement = Account.update_statement(account_id, account.column_values(), versions)
+        return self.account_response(await self.write(account_id, statement, versions))
+
+    async def patch_account(self, request, account_id):
+        """Applies a JSON Merge Patch to the Account with the given ID, honoring If-Match"""
+        versions = get_if_match_versions(account_id, request.if_match)
+        data = request.get_json("application/merge-patch+json", "application/json")
+        statement = Account.update_statement(account_id, Account.patch_values(data), versions)
+        return self.account_response(await self.write(account_id, statement, versions))
+
+    async def delete_account(self, request, account_id):
+        """Deletes the Account with the given ID, honoring If-Match"""
+        versions = get_if_match_versions(account_id, request.if_match)
+        await self.write(account_id, Account.delete_statement(account_id, versions), versions)
+        return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+    @staticmethod
+    def account_response(row):
+        """Returns an updated Account row with its ETag"""
+        etag = quote_etag(f"{row.id}-{row.version}")
+        return Response.json(select_fields(row, READABLE_COLUMNS), headers={"ETag": etag})
+
+    @staticmethod
+    def conditional_response(request, etag, make_body, headers=None):
+        """Returns 304 Not Modified when the client already holds etag"""
+        headers = dict(headers or {}, ETag=quote_etag(etag))
+        if request.if_none_match.contains_weak(etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response.json(make_body(), headers=headers)
+
+
+settings = Config(os.path.dirname(__file__))
+settings.from_object(default_config)
+app = AccountService(settings)
@@ -0,0 +1,63 @@
+"""
+Request Access Log
+
+This module writes one JSON line per request with its route template,
+status, latency, database time and size. Successful requests are
+sampled at ACCESS_LOG_SAMPLE_RATE while errors and requests slower than
+SLOW_REQUEST_THRESHOLD_MS are always logged.
+"""
+import random
+import re
+import time
+import uuid
+from flask import g, request
+
+REQUEST_ID_HEADER = "X-Request-ID"
+# a request id sent by a client or proxy is only reused when it is sane
+VALID_REQUEST_ID = re.compile(r"^[A-Za-z0-9._:-]{1,128}$")
+
+
+def init_access_log(app):
+    """Logs every request and tags its response with a request id"""
+    app.before_request(_start_request)
+
+    @app.after_request
+    def log_request(response):  # pylint: disable=unused-variable
+        if "access_start" not in g:
+            return response
+        response.headers[REQUEST_ID_HEADER] = g.request_id
+        latency_ms = (time.perf_counter() - g.access_start) * 1000
+        threshold = app.config.get("SLOW_REQUEST_THRESHOLD_MS")
+        slow = threshold is not None and latency_ms >= threshold
+        if response.status_code < 400 and not slow:
+            if random.random() >= app.config.get("ACCESS_LOG_SAMPLE_RATE", 1.0):
+                return response
+        fields = {
+            "event": "request",
+            "request_id": g.request_id,
+            "method": request.method,
+            "route": request.url_rule.rule if request.url_rule else None,
+            "path": request.path,
+            "status": response.status_code,
+            "duration_ms": round(latency_ms, 2),
+            # the query counters are kept by the query_log module
+            "db_queries": g.get("db_query_count", 0),
+            "db_duration_ms": round(g.get("db_query_seconds", 0.0) * 1000, 2),
+            "bytes_out": response.content_length,
+        }
+        if response.status_code >= 500:
+            log = app.logger.error
+        elif response.status_code >= 400 or slow:
+            log = app.logger.warning
+        else:
+            log = app.logger.info
+        # the JsonFormatter writes the fields as keys of the line
+        log("%s %s %s", request.method, request.path, response.status_code,
+            extra={"fields": fields})
+        return response
+
+
+def _start_request():
+    g.access_start = time.perf_counter()
+    request_id = request.headers.get(REQUEST_ID_HEADER, "")
+    g.request_id = request_id if VALID_REQUEST_ID.match(request_id) else uuid.uuid4().hex
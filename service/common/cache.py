@@ -0,0 +1,220 @@
+"""
+Cache Backends
+
+This module contains the caches used to save a database round trip
+when a single record is looked up by its ID. Values are JSON friendly
+dictionaries so every backend can store them.
+"""
+import json
+import logging
+import socket
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlparse
+
+logger = logging.getLogger("flask.app")
+
+
+def create_cache(config):
+    """Creates the cache backend selected by CACHE_BACKEND"""
+    backend = config.get("CACHE_BACKEND", "none")
+    if backend == "memory":
+        return LRUCache(config["CACHE_MAX_SIZE"], config["CACHE_TTL"])
+    if backend == "redis":
+        return RedisCache(
+            config["CACHE_REDIS_URL"], config["CACHE_TTL"],
+            eject_seconds=config.get("CACHE_REDIS_EJECT_SECONDS", 5),
+        )
+    return NullCache()
+
+
+######################################################################
+#  C A C H E   B A S E
+######################################################################
+class CacheBase:
+    """Base class that counts cache hits and misses"""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Returns the cached value for key or None"""
+        value = self._get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def stats(self):
+        """Returns the hit and miss counters"""
+        return {"hits": self.hits, "misses": self.misses}
+
+    def _get(self, key):
+        raise NotImplementedError
+
+    def set(self, key, value):
+        """Stores value under key"""
+        raise NotImplementedError
+
+    def delete(self, *keys):
+        """Removes keys from the cache"""
+        raise NotImplementedError
+
+
+class NullCache(CacheBase):
+    """A cache that never holds anything"""
+
+    def _get(self, key):
+        return None
+
+    def set(self, key, value):
+        pass
+
+    def delete(self, *keys):
+        pass
+
+
+######################################################################
+#  I N - P R O C E S S   L R U   C A C H E
+######################################################################
+class LRUCache(CacheBase):
+    """A thread safe in-process cache with LRU eviction and a TTL"""
+
+    def __init__(self, max_size=10000, ttl=60):
+        super().__init__()
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def __len__(self):
+        return len(self._data)
+
+
+######################################################################
+#  R E D I S   C A C H E
+######################################################################
+class RedisCache(CacheBase):  # pylint: disable=too-many-instance-attributes
+    """
+    A cache kept in Redis (or anything that speaks its protocol)
+
+    Only GET, SET and DEL are needed so the protocol is spoken directly
+    over one socket per thread. Any network error is logged and treated
+    as a cache miss so the database is used instead, and Redis is then
+    ejected: GET and SET skip it for eject_seconds rather than wait for
+    a timeout on every request. DEL is still sent so writes keep
+    invalidating what Redis may hold.
+    """
+
+    def __init__(self, url, ttl=60, timeout=0.5, eject_seconds=5):
+        # pylint: disable=too-many-arguments
+        super().__init__()
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.database = parsed.path.strip("/") or "0"
+        self.ttl = ttl
+        self.timeout = timeout
+        self.eject_seconds = eject_seconds
+        self._ejected_until = 0.0
+        self._local = threading.local()
+
+    def _get(self, key):
+        if self.is_ejected():
+            return None
+        value = self._command("GET", key)
+        return json.loads(value) if value else None
+
+    def set(self, key, value):
+        if not self.is_ejected():
+            self._command("SET", key, json.dumps(value), "EX", str(self.ttl))
+
+    def delete(self, *keys):
+        if keys:
+            self._command("DEL", *keys)
+
+    def _connect(self):
+        """Opens the socket for this thread and selects the database"""
+        sock = socket.create_connection((self.host, self.port), self.timeout)
+        self._local.sock = sock
+        self._local.reader = sock.makefile("rb")
+        if self.password:
+            self._send("AUTH", self.password)
+        if self.database != "0":
+            self._send("SELECT", self.database)
+
+    def _command(self, *args):
+        """Sends a command and returns its reply, or None if Redis is unreachable"""
+        try:
+            if getattr(self._local, "sock", None) is None:
+                self._connect()
+            reply = self._send(*args)
+        except (OSError, ValueError) as error:
+            logger.warning("Cache command %s failed, skipping the cache for %ss: %s",
+                           args[0], self.eject_seconds, error)
+            self._close()
+            self._ejected_until = time.monotonic() + self.eject_seconds
+            return None
+        self._ejected_until = 0.0
+        return reply
+
+    def is_ejected(self):
+        """Returns True while a recent failure keeps reads away from Redis"""
+        return time.monotonic() < self._ejected_until
+
+    def _send(self, *args):
+        """Writes one command in the Redis protocol and reads the reply"""
+        parts = [f"*{len(args)}\r\n".encode()]
+        for arg in args:
+            data = arg.encode("utf-8")
+            parts.append(f"${len(data)}\r\n".encode() + data + b"\r\n")
+        self._local.sock.sendall(b"".join(parts))
+        return self._read_reply()
+
+    def _read_reply(self):
+        line = self._local.reader.readline()
+        if not line:
+            raise ConnectionError("Connection closed by server")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b"-":
+            raise ValueError(payload.decode("utf-8"))
+        if kind == b"$":
+            length = int(payload)
+            if length < 0:
+                return None
+            return self._local.reader.read(length + 2)[:-2].decode("utf-8")
+        return payload.decode("utf-8")
+
+    def _close(self):
+        sock = getattr(self._local, "sock", None)
+        self._local.sock = None
+        if sock is not None:
+            sock.close()
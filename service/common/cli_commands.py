@@ -1,8 +1,82 @@
 """
 Flask CLI Command Extensions
 """
-from service import app
-from service.models import db
+import csv
+import json
+import click
+from flask import Blueprint
+from service.models import db, Account
+from service.migrations import MIGRATIONS
+from service.common.migrations import Migrator
+
+# the commands are added to the flask command itself, not to a group
+commands = Blueprint("commands", __name__, cli_group=None)
+
+
+######################################################################
+# Command to create the tables that do not exist yet
+# Usage:
+#   flask db-init
+######################################################################
+@commands.cli.command("db-init")
+def db_init():
+    """
+    Creates the database tables that are missing. Run it once per release,
+    before the service starts; the service never creates tables itself.
+    """
+    db.create_all()
+    db.session.commit()
+
+
+######################################################################
+# Command to apply the pending schema migrations
+# Usage:
+#   flask db-migrate --lock-timeout 2000 --batch-size 1000
+######################################################################
+@commands.cli.command("db-migrate")
+@click.option(
+    "--target", type=int, help="Last migration to apply, all of them if not given",
+)
+@click.option(
+    "--lock-timeout", default=2000, show_default=True, type=click.IntRange(min=1),
+    help="Milliseconds a statement waits for a lock before it is retried",
+)
+@click.option(
+    "--retries", default=5, show_default=True, type=click.IntRange(min=0),
+    help="Times a statement is retried after its lock wait timed out",
+)
+@click.option(
+    "--batch-size", default=1000, show_default=True, type=click.IntRange(min=1),
+    help="IDs updated per transaction by backfills",
+)
+def db_migrate(target, lock_timeout, retries, batch_size):
+    """
+    Applies the pending schema migrations without taking long locks
+    """
+    migrator = Migrator(
+        db.engine, MIGRATIONS,
+        lock_timeout_ms=lock_timeout, retries=retries, batch_size=batch_size,
+    )
+    applied = 0
+    for migration, elapsed in migrator.migrate(target):
+        applied += 1
+        click.echo(f"Applied {migration.version}: {migration.description} in {elapsed:.1f}s")
+    click.echo(f"Applied {applied} migrations")
+
+
+######################################################################
+# Command to list the schema migrations
+# Usage:
+#   flask db-status
+######################################################################
+@commands.cli.command("db-status")
+def db_status():
+    """
+    Lists the schema migrations and when each was applied
+    """
+    for migration, applied_at in Migrator(db.engine, MIGRATIONS).status():
+        applied = applied_at.isoformat(" ", "seconds") if applied_at else "pending"
+        click.echo(f"{migration.version:>4}  {applied:<25}  {migration.description}")
 
 
 ######################################################################
@@ -10,7 +84,7 @@ from service.models import db
 # Usage:
 #   flask db-create
 ######################################################################
-@app.cli.command("db-create")
+@commands.cli.command("db-create")
 def db_create():
     """
     Recreates a local database. You probably should not use this on
@@ -19,3 +93,80 @@ def db_create():
     db.drop_all()
     db.create_all()
     db.session.commit()
+
+
+######################################################################
+# Command to bulk load accounts from a file
+# Usage:
+#   flask accounts-import partners.csv --batch-size 50000
+######################################################################
+@commands.cli.command("accounts-import")
+@click.argument("filename", type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    "--format", "file_format", type=click.Choice(["csv", "ndjson"]),
+    help="File format, guessed from the file extension if not given",
+)
+@click.option(
+    "--batch-size", default=10000, show_default=True, type=click.IntRange(min=1),
+    help="Rows to COPY per transaction",
+)
+def accounts_import(filename, file_format, batch_size):
+    """
+    Bulk loads Accounts from a CSV or NDJSON file using PostgreSQL COPY.
+    Rows that are invalid or whose email is already taken are skipped.
+    """
+    if not file_format:
+        file_format = "csv" if filename.lower().endswith(".csv") else "ndjson"
+
+    total_read = total_inserted = 0
+    with open(filename, newline="", encoding="utf-8") as source:
+        if file_format == "csv":
+            rows = csv.DictReader(source)
+        else:
+            rows = _read_ndjson(source)
+        for read, inserted in Account.import_rows(rows, batch_size):
+            total_read += read
+            total_inserted += inserted
+            click.echo(f"Imported {total_inserted} of {total_read} rows...")
+
+    click.echo(
+        f"Imported {total_inserted} Accounts, "
+        f"skipped {total_read - total_inserted} invalid or duplicate rows"
+    )
+
+
+def _read_ndjson(source):
+    """Yields the value on each line of an NDJSON file, or None for a line that is not JSON"""
+    for line in source:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield None  # counted as an invalid row like a bad CSV row
+
+
+######################################################################
+# Command to dump all accounts to a file
+# Usage:
+#   flask accounts-export --format csv --output accounts.csv
+######################################################################
+@commands.cli.command("accounts-export")
+@click.option(
+    "--format", "file_format", type=click.Choice(["csv", "ndjson"]),
+    default="csv", show_default=True,
+)
+@click.option(
+    "--output", type=click.File("wb"), default="-",
+    help="File to write to, standard output if not given",
+)
+@click.option(
+    "--chunk-size", default=50000, show_default=True, type=click.IntRange(min=1),
+    help="Rows to COPY per round trip",
+)
+def accounts_export(file_format, output, chunk_size):
+    """
+    Dumps all Accounts as CSV or NDJSON using PostgreSQL COPY TO STDOUT
+    """
+    for chunk in Account.export_rows(file_format, chunk_size):
+        output.write(chunk)
@@ -1,22 +1,54 @@
 """
 Module: error_handlers
 """
-from flask import jsonify
-from service.models import DataValidationError
-from service import app
+from flask import Blueprint, jsonify
+from flask import current_app as app
+from sqlalchemy.exc import IntegrityError
+from service.models import DataValidationError, db
 from . import status
 
+errors = Blueprint("errors", __name__)
+
+# SQLSTATE of a unique_violation
+UNIQUE_VIOLATION = "23505"
+
 
 ######################################################################
 # Error Handlers
 ######################################################################
-@app.errorhandler(DataValidationError)
+@errors.app_errorhandler(DataValidationError)
 def request_validation_error(error):
     """Handles Value Errors from bad data"""
     return bad_request(error)
 
 
-@app.errorhandler(status.HTTP_400_BAD_REQUEST)
+@errors.app_errorhandler(IntegrityError)
+def database_integrity_error(error):
+    """Handles unique constraint violations with 409_CONFLICT"""
+    db.session.rollback()
+    # the detail of the error holds the conflicting values, so it is only logged
+    if getattr(error.orig, "pgcode", None) != UNIQUE_VIOLATION:
+        app.logger.error("Integrity error: %s", error.orig)
+        return (
+            jsonify(
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                error="Internal Server Error",
+                message="The data broke a database constraint",
+            ),
+            status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
+    app.logger.warning("Unique violation: %s", error.orig)
+    return (
+        jsonify(
+            status=status.HTTP_409_CONFLICT,
+            error="Conflict",
+            message="A record with the same unique values already exists",
+        ),
+        status.HTTP_409_CONFLICT,
+    )
+
+
+@errors.app_errorhandler(status.HTTP_400_BAD_REQUEST)
 def bad_request(error):
     """Handles bad requests with 400_BAD_REQUEST"""
     message = str(error)
@@ -29,7 +61,7 @@ def bad_request(error):
     )
 
 
-@app.errorhandler(status.HTTP_404_NOT_FOUND)
+@errors.app_errorhandler(status.HTTP_404_NOT_FOUND)
 def not_found(error):
     """Handles resources not found with 404_NOT_FOUND"""
     message = str(error)
@@ -40,7 +72,7 @@ def not_found(error):
     )
 
 
-@app.errorhandler(status.HTTP_405_METHOD_NOT_ALLOWED)
+@errors.app_errorhandler(status.HTTP_405_METHOD_NOT_ALLOWED)
 def method_not_supported(error):
     """Handles unsupported HTTP methods with 405_METHOD_NOT_SUPPORTED"""
     message = str(error)
@@ -55,7 +87,22 @@ def method_not_supported(error):
     )
 
 
-@app.errorhandler(status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+@errors.app_errorhandler(status.HTTP_412_PRECONDITION_FAILED)
+def precondition_failed(error):
+    """Handles stale conditional requests with 412_PRECONDITION_FAILED"""
+    message = str(error)
+    app.logger.warning(message)
+    return (
+        jsonify(
+            status=status.HTTP_412_PRECONDITION_FAILED,
+            error="Precondition Failed",
+            message=message,
+        ),
+        status.HTTP_412_PRECONDITION_FAILED,
+    )
+
+
+@errors.app_errorhandler(status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
 def mediatype_not_supported(error):
     """Handles unsupported media requests with 415_UNSUPPORTED_MEDIA_TYPE"""
     message = str(error)
@@ -70,7 +117,7 @@ def mediatype_not_supported(error):
     )
 
 
-@app.errorhandler(status.HTTP_500_INTERNAL_SERVER_ERROR)
+@errors.app_errorhandler(status.HTTP_500_INTERNAL_SERVER_ERROR)
 def internal_server_error(error):
     """Handles unexpected server error with 500_SERVER_ERROR"""
     message = str(error)
@@ -0,0 +1,108 @@
+"""
+Health Probes
+
+Readiness checks the connection pool of the worker and runs SELECT 1 on
+the database. Kubernetes probes every pod every few seconds, so the
+result is cached for HEALTH_CACHE_SECONDS and only one thread of a
+worker probes at a time while the others answer with the last result.
+"""
+import threading
+import time
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from service.common.pool_stats import pool_status
+from service.models import db
+
+# Readiness states: DEGRADED is still ready to serve, DOWN is not
+OK = "OK"
+DEGRADED = "DEGRADED"
+DOWN = "DOWN"
+
+
+def init_health(app):
+    """Sets up the cached readiness probe of the app"""
+    app.extensions["readiness_probe"] = CachedProbe(
+        lambda: check_readiness(db.get_engine(app), db.replica_router, app.config),
+        app.config.get("HEALTH_CACHE_SECONDS", 2.0),
+    )
+
+
+def readiness(app):
+    """Returns the cached readiness of the app"""
+    return app.extensions["readiness_probe"].result()
+
+
+def check_readiness(engine, replica_router, config):
+    """
+    Probes the database of an engine and the saturation of its pool
+
+    The database is not queried when the pool has no connection left, so
+    the probe never waits for one.
+
+    Returns:
+        dict: the status, the reasons it is not OK and what was measured
+    """
+    reasons = []
+    pool = pool_status(engine)
+    capacity = pool.get("size", 0) + pool.get("max_overflow", 0)
+    if "size" in pool and capacity > 0:
+        pool["saturation"] = round(pool["in_use"] / capacity, 3)
+        if pool["saturation"] >= 1:
+            reasons.append("The connection pool is exhausted")
+            return {"status": DOWN, "reasons": reasons, "pool": pool}
+        if pool["saturation"] >= config.get("HEALTH_POOL_SATURATION_THRESHOLD", 0.8):
+            reasons.append("The connection pool is nearly exhausted")
+
+    database = {}
+    started = time.perf_counter()
+    try:
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+    except SQLAlchemyError as error:
+        reasons.append(f"The database is unreachable: {error.__class__.__name__}")
+        return {"status": DOWN, "reasons": reasons, "pool": pool}
+    database["latency_ms"] = round((time.perf_counter() - started) * 1000, 3)
+    if database["latency_ms"] > config.get("HEALTH_DB_LATENCY_THRESHOLD_MS", 100):
+        reasons.append("The database is slow to answer")
+
+    result = {
+        "status": DEGRADED if reasons else OK,
+        "reasons": reasons,
+        "pool": pool,
+        "database": database,
+    }
+    if replica_router is not None:
+        result["replicas"] = {
+            "healthy": replica_router.healthy_count(), "total": len(replica_router.engines)
+        }
+        if result["replicas"]["healthy"] == 0:
+            # reads fall back to the primary
+            reasons.append("Every read replica is ejected")
+            result["status"] = DEGRADED
+    return result
+
+
+class CachedProbe:  # pylint: disable=too-few-public-methods
+    """Runs a check at most once every ttl seconds and shares its result between threads"""
+
+    def __init__(self, check, ttl):
+        self.check = check
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._result = None
+        self._expires = 0.0
+
+    def result(self):
+        """Returns the last result while it is fresh, checking again once it is not"""
+        if self._result is not None and time.monotonic() < self._expires:
+            return self._result
+        # while another thread checks, answer with the last result if there is one
+        if not self._lock.acquire(blocking=self._result is None):  # pylint: disable=consider-using-with
+            return self._result
+        try:
+            if self._result is None or time.monotonic() >= self._expires:
+                self._result = self.check()
+                self._expires = time.monotonic() + self.ttl
+            return self._result
+        finally:
+            self._lock.release()
@@ -0,0 +1,62 @@
+"""
+JSON Codec
+
+This module encodes JSON with orjson when it is installed and falls
+back to the standard library otherwise. Both handle date and datetime
+values natively by writing them in ISO 8601 format.
+"""
+import json
+from datetime import date
+from flask import Response
+from flask.json import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+def init_json(app):
+    """Makes jsonify use orjson when it is installed"""
+    if orjson is not None:
+        app.json_encoder = OrjsonEncoder
+
+
+def dumps(obj) -> bytes:
+    """Encodes obj as compact UTF-8 JSON"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, default=_default, ensure_ascii=False, separators=(",", ":")).encode(
+        "utf-8"
+    )
+
+
+def json_response(obj, status_code=200, headers=None):
+    """Returns a JSON response of obj, encoded without going through jsonify"""
+    return Response(dumps(obj), status_code, headers, mimetype="application/json")
+
+
+def _default(obj):
+    if isinstance(obj, date):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class OrjsonEncoder(JSONEncoder):
+    """
+    The Flask JSON encoder backed by orjson
+
+    Anything orjson cannot encode, like integers wider than 64 bits or
+    dictionaries with non string keys, is left to the standard encoder.
+    """
+
+    def encode(self, o):
+        option = 0
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if self.indent:
+            option |= orjson.OPT_INDENT_2
+        try:
+            return orjson.dumps(o, default=self.default, option=option).decode("utf-8")
+        except orjson.JSONEncodeError:
+            return super().encode(o)
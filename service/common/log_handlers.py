@@ -2,21 +2,169 @@
 Log Handlers
 
 This module contains utility functions to set up logging
-consistently
+consistently. Records are handed to a background thread through a
+bounded queue so that writing logs never blocks a request.
 """
+import atexit
+import json
 import logging
+import queue
+import random
+from logging.handlers import QueueHandler, QueueListener
+from flask import has_request_context, request
+
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S %z"
+
+# The logger of the modules that log without an app, like models and cache
+MODULE_LOGGER = "flask.app"
+
+# The listener thread of this process, replaced each time logging is set up
+_current = {}
 
 
 def init_logging(app, logger_name: str):
     """Set up logging for production"""
-    app.logger.propagate = False
     gunicorn_logger = logging.getLogger(logger_name)
-    app.logger.handlers = gunicorn_logger.handlers
-    app.logger.setLevel(gunicorn_logger.level)
+    # outside gunicorn, as under flask run or a flask command, write to stderr
+    handlers = gunicorn_logger.handlers or [logging.StreamHandler()]
     # Make all log formats consistent
-    formatter = logging.Formatter(
-        "[%(asctime)s] [%(levelname)s] [%(module)s] %(message)s", "%Y-%m-%d %H:%M:%S %z"
-    )
-    for handler in app.logger.handlers:
+    if app.config.get("LOG_FORMAT", "json") == "json":
+        formatter = JsonFormatter(datefmt=DATE_FORMAT)
+    else:
+        formatter = TextFormatter(
+            "[%(asctime)s] [%(levelname)s] [%(module)s] %(message)s", DATE_FORMAT
+        )
+    for handler in handlers:
         handler.setFormatter(formatter)
+
+    # The gunicorn handlers do the formatting and writing on the listener thread
+    queue_handler = DroppingQueueHandler(queue.Queue(app.config.get("LOG_QUEUE_SIZE", 10000)))
+    queue_handler.addFilter(SamplingFilter(
+        app.config.get("LOG_SAMPLE_RATE", 1.0), app.config.get("LOG_SAMPLED_ROUTES", [])
+    ))
+    for logger in (app.logger, logging.getLogger(MODULE_LOGGER)):
+        logger.propagate = False
+        logger.setLevel(gunicorn_logger.level)
+        logger.handlers = [queue_handler]
+    _stop_listener()
+    _start_listener(app, queue_handler, handlers)
     app.logger.info("Logging handler established")
+
+
+def restart_logging(app):
+    """
+    Starts a new listener thread for the app logs in a forked process
+
+    Threads do not survive a fork, so a worker forked from a process that
+    set up logging must call this or its records are never written.
+    """
+    queue_handler = app.logger.handlers[0]
+    old_listener = app.extensions["log_listener"]
+    atexit.unregister(old_listener.stop)
+    # the old queue may hold records, or a lock, of the parent process
+    queue_handler.queue = queue.Queue(queue_handler.queue.maxsize)
+    _start_listener(app, queue_handler, old_listener.handlers)
+
+
+def _start_listener(app, queue_handler, handlers):
+    listener = QueueListener(queue_handler.queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    app.extensions["log_listener"] = listener
+    _current["listener"] = listener
+
+
+def _stop_listener():
+    """Stops the listener of an app set up before, it would write to the same handlers"""
+    listener = _current.pop("listener", None)
+    if listener is None:
+        return
+    atexit.unregister(listener.stop)
+    if listener._thread is not None:  # pylint: disable=protected-access
+        listener.stop()  # writes the records still in its queue
+
+
+class DroppingQueueHandler(QueueHandler):
+    """A QueueHandler that drops records instead of waiting when the queue is full"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # formatting is left to the listener thread
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class SamplingFilter(logging.Filter):  # pylint: disable=too-few-public-methods
+    """
+    Keeps only a sample of the INFO and lower records of hot routes
+
+    Args:
+        rate (float): the share of records to keep, from 0 to 1
+        routes (list): the route templates to sample, like /accounts/<int:id>
+    """
+
+    def __init__(self, rate, routes):
+        super().__init__()
+        self.rate = rate
+        self.routes = frozenset(routes)
+
+    def filter(self, record):
+        if record.levelno > logging.INFO or self.rate >= 1 or not has_request_context():
+            return True
+        if request.url_rule is None or request.url_rule.rule not in self.routes:
+            return True
+        return random.random() < self.rate
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats each record as a single line of JSON
+
+    The dict a record carries in extra={"fields": ...} is merged into the
+    line, so structured logs are not encoded twice.
+    """
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record, self.datefmt),
+            "level": record.levelname,
+            "module": record.module,
+            "message": record.getMessage(),
+        }
+        for key, value in getattr(record, "fields", {}).items():
+            entry.setdefault(key, value)
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry)
+
+
+class TextFormatter(logging.Formatter):
+    """
+    Formats each record as a line of text
+
+    The dict a record carries in extra={"fields": ...} is appended to the
+    message as key=value pairs, so text logs keep the same data as JSON.
+    """
+
+    def formatMessage(self, record):
+        message = super().formatMessage(record)
+        fields = getattr(record, "fields", {})
+        if not fields:
+            return message
+        pairs = " ".join(f"{key}={_text_value(value)}" for key, value in fields.items())
+        return f"{message} {pairs}"
+
+
+def _text_value(value):
+    """Quotes the values that would not read as a single token"""
+    if isinstance(value, str) and value and " " not in value and '"' not in value:
+        return value
+    return json.dumps(value)
@@ -0,0 +1,127 @@
+"""
+Prometheus Metrics
+
+This module records request, database and connection pool metrics and
+serves them on /metrics. When PROMETHEUS_MULTIPROC_DIR is set (as it is
+under gunicorn) the samples of every worker process are aggregated.
+"""
+import os
+import threading
+import time
+from flask import Response, g, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+)
+from prometheus_client.multiprocess import MultiProcessCollector
+from service.common.pool_stats import pool_status
+from service.models import db, PersistentBase
+
+REQUEST_COUNT = Counter(
+    "http_requests_total", "HTTP requests handled", ["method", "route", "status"]
+)
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "Time spent handling HTTP requests",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight", "HTTP requests being handled", multiprocess_mode="livesum"
+)
+DB_QUERIES = Histogram(
+    "http_request_db_queries", "Database queries run per HTTP request", ["route"],
+    buckets=(0, 1, 2, 3, 5, 10, 25, 50, 100),
+)
+DB_DURATION = Histogram(
+    "http_request_db_duration_seconds", "Time spent in the database per HTTP request", ["route"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+POOL_GAUGES = {
+    name: Gauge(f"db_pool_{name}", description, multiprocess_mode="livesum")
+    for name, description in (
+        ("size", "Connections the pools keep open"),
+        ("in_use", "Connections checked out of the pools"),
+        ("idle", "Connections waiting in the pools"),
+        ("overflow", "Connections opened beyond the pool size"),
+    )
+}
+# Counters keep the totals of the workers that were recycled, livesum gauges drop them
+POOL_COUNTERS = {
+    name: Counter(f"db_pool_{name}", description)
+    for name, description in (
+        ("checkouts", "Connections checked out of the pools"),
+        ("timeouts", "Checkouts that timed out"),
+        ("wait_seconds", "Time spent waiting for a connection"),
+    )
+}
+POOL_MAX_WAIT = Gauge(
+    "db_pool_max_wait_seconds", "Longest wait for a connection", multiprocess_mode="max"
+)
+STARTUP_SECONDS = Gauge(
+    "app_startup_seconds", "Time create_app took to build the Flask app", multiprocess_mode="max"
+)
+CACHE_COUNTERS = {name: Counter(f"cache_{name}", f"Cache {name}") for name in ("hits", "misses")}
+
+# The totals last added to each counter by this process
+_last_totals = {}
+_totals_lock = threading.Lock()
+
+
+def init_metrics(app):
+    """Records metrics for every request and serves them on /metrics"""
+    app.before_request(_start_request)
+    app.teardown_request(_end_request)
+
+    @app.after_request
+    def record_request(response):  # pylint: disable=unused-variable
+        if "request_start" not in g:
+            return response
+        route = request.url_rule.rule if request.url_rule else "<unmatched>"
+        labels = (request.method, route, str(response.status_code))
+        REQUEST_COUNT.labels(*labels).inc()
+        REQUEST_LATENCY.labels(*labels).observe(time.perf_counter() - g.request_start)
+        # the query counters are kept by the query_log module
+        DB_QUERIES.labels(route).observe(g.get("db_query_count", 0))
+        DB_DURATION.labels(route).observe(g.get("db_query_seconds", 0.0))
+        pool = pool_status(db.engine)
+        for name, value in pool.items():
+            if name in POOL_GAUGES:
+                POOL_GAUGES[name].set(value)
+        if "max_wait_seconds" in pool:
+            POOL_MAX_WAIT.set(pool["max_wait_seconds"])
+        _add_totals(POOL_COUNTERS, pool)
+        _add_totals(CACHE_COUNTERS, PersistentBase.cache.stats())
+        return response
+
+    app.add_url_rule("/metrics", "metrics", metrics)
+
+
+def metrics():
+    """Returns the metrics of every worker in the Prometheus text format"""
+    registry = REGISTRY
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        MultiProcessCollector(registry)
+    return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
+
+
+def _add_totals(counters, totals):
+    """Increments each counter by what its running total grew since it was last added"""
+    with _totals_lock:
+        for name, counter in counters.items():
+            if name not in totals:
+                continue
+            total = totals[name]
+            last = _last_totals.get(counter, 0)
+            # the totals start again from zero when a pool or cache is replaced
+            counter.inc(total - last if total >= last else total)
+            _last_totals[counter] = total
+
+
+def _start_request():
+    g.request_start = time.perf_counter()
+    REQUESTS_IN_FLIGHT.inc()
+
+
+def _end_request(_error):
+    if g.pop("request_start", None) is not None:
+        REQUESTS_IN_FLIGHT.dec()
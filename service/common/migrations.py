@@ -0,0 +1,232 @@
+"""
+Schema Migrations
+
+Numbered changes to the schema of a live database. The versions that
+were applied are recorded in the schema_migrations table so each one
+runs once, and a PostgreSQL advisory lock keeps two processes, such as
+the init containers of several pods, from migrating at the same time.
+
+Every statement runs in its own transaction under a short lock_timeout.
+When a busy table cannot be locked in time the statement gives up and
+is retried a little later, instead of making the application's queries
+queue behind it. Indexes are built with CREATE INDEX CONCURRENTLY and
+backfills update one range of IDs per transaction, so the tables stay
+readable and writable while they change.
+"""
+import logging
+import time
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+logger = logging.getLogger("flask.app")
+
+# Key of the advisory lock held while migrating, "acct" in ASCII
+MIGRATION_LOCK_KEY = 0x61636374
+
+# SQLSTATE raised when lock_timeout expires
+LOCK_NOT_AVAILABLE = "55P03"
+
+HISTORY_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version integer PRIMARY KEY,
+    description text NOT NULL,
+    applied_at timestamptz NOT NULL DEFAULT now(),
+    duration_ms double precision NOT NULL
+)
+"""
+
+# Indexes left INVALID by a concurrent build that failed or was cancelled
+INVALID_INDEX_SQL = """
+SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+WHERE c.relname = :name AND NOT i.indisvalid
+"""
+
+
+class Migration:  # pylint: disable=too-few-public-methods
+    """A numbered change to the schema, made by calling apply with a SchemaEditor"""
+
+    def __init__(self, version, description, apply):
+        self.version = version
+        self.description = description
+        self.apply = apply
+
+    def __repr__(self):
+        return f"<Migration {self.version} {self.description}>"
+
+
+class SchemaEditor:
+    """
+    Makes schema changes on a connection in autocommit mode
+
+    Write migrations so they can run again after a failure: the statements
+    of a migration are committed one by one, and the helpers below only
+    add what is missing.
+    """
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, connection, lock_timeout_ms=2000, retries=5, retry_delay=1.0,
+                 batch_size=1000):
+        self.connection = connection
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.batch_size = batch_size
+        connection.execute(text(f"SET lock_timeout = {int(lock_timeout_ms)}"))
+
+    def execute(self, sql, **params):
+        """Runs one statement, retrying it while its locks cannot be had in time"""
+        return self._retry(sql, lambda: self.connection.execute(text(sql), params))
+
+    def add_column(self, table, column, definition):
+        """
+        Adds a column unless it exists
+
+        A constant DEFAULT, or none, only changes the catalog. A volatile
+        default rewrites the table, so add the column without one and
+        backfill it instead.
+        """
+        self.execute(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {column} {definition}")
+
+    def create_index(self, name, table, expression, unique=False, where=None):
+        # pylint: disable=too-many-arguments
+        """Builds an index without blocking writes, replacing an invalid one a failed build left"""
+        sql = (
+            f"CREATE {'UNIQUE ' if unique else ''}INDEX CONCURRENTLY IF NOT EXISTS {name} "
+            f"ON {table} ({expression})"
+        )
+        if where:
+            sql += f" WHERE {where}"
+
+        def build():
+            if self.connection.execute(text(INVALID_INDEX_SQL), {"name": name}).first():
+                logger.warning("Dropping the invalid index %s", name)
+                self.connection.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+            return self.connection.execute(text(sql))
+
+        # a build that times out leaves an invalid index behind to drop
+        self._retry(sql, build)
+
+    def drop_index(self, name):
+        """Drops an index without blocking the queries on its table"""
+        self.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+
+    def backfill(self, table, assignments, where="TRUE", pause=0.0):
+        """
+        Updates the rows that match where, batch_size IDs per transaction
+
+        Rows inserted after the backfill starts are left to the code that
+        inserts them, so deploy that code first.
+
+        Args:
+            table (string): the table to update, with an integer id key
+            assignments (string): the SET clause, like "version = 1"
+            where (string): the condition of the rows that need updating
+            pause (float): seconds to sleep between batches to spare the replicas
+
+        Returns:
+            int: the number of rows updated
+        """
+        low, high = self.connection.execute(text(f"SELECT min(id), max(id) FROM {table}")).one()
+        if low is None:
+            return 0
+        sql = f"UPDATE {table} SET {assignments} WHERE id >= :start AND id < :end AND ({where})"
+        updated = 0
+        for start in range(low, high + 1, self.batch_size):
+            end = start + self.batch_size
+            updated += self.execute(sql, start=start, end=end).rowcount
+            logger.info("Backfilled %s rows of %s below id %s", updated, table, end)
+            if pause:
+                time.sleep(pause)
+        return updated
+
+    def _retry(self, sql, run):
+        """Calls run, retrying it with backoff when lock_timeout expires"""
+        for attempt in range(self.retries + 1):
+            try:
+                return run()
+            except OperationalError as error:
+                timed_out = getattr(error.orig, "pgcode", None) == LOCK_NOT_AVAILABLE
+                if not timed_out or attempt == self.retries:
+                    raise
+                delay = self.retry_delay * 2 ** attempt
+                logger.warning("Lock not available, retrying in %.1fs: %s", delay, sql)
+                time.sleep(delay)
+        return None  # not reached, the last attempt returns or raises
+
+
+class Migrator:
+    """Applies the pending migrations of a list to a database"""
+
+    def __init__(self, engine, migrations, lock_poll_seconds=1.0, **editor_options):
+        self.engine = engine
+        self.migrations = sorted(migrations, key=lambda migration: migration.version)
+        self.lock_poll_seconds = lock_poll_seconds
+        self.editor_options = editor_options
+
+    def status(self):
+        """Returns each migration with the time it was applied, or None when it is pending"""
+        with self.engine.connect() as connection:
+            applied = self._applied(connection)
+        return [(migration, applied.get(migration.version)) for migration in self.migrations]
+
+    def migrate(self, target=None):
+        """
+        Applies the pending migrations up to the target version in order
+
+        Yields:
+            tuple: each Migration applied and the seconds it took
+        """
+        with self.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            connection.execute(text(HISTORY_TABLE_SQL))
+            self._lock(connection)
+            try:
+                # read after taking the lock, another process may just have migrated
+                applied = self._applied(connection)
+                editor = SchemaEditor(connection, **self.editor_options)
+                for migration in self.migrations:
+                    if migration.version in applied:
+                        continue
+                    if target is not None and migration.version > target:
+                        break
+                    logger.info("Applying migration %s: %s",
+                                migration.version, migration.description)
+                    started = time.perf_counter()
+                    migration.apply(editor)
+                    elapsed = time.perf_counter() - started
+                    connection.execute(
+                        text(
+                            "INSERT INTO schema_migrations (version, description, duration_ms) "
+                            "VALUES (:version, :description, :duration_ms)"
+                        ),
+                        {
+                            "version": migration.version,
+                            "description": migration.description,
+                            "duration_ms": elapsed * 1000,
+                        },
+                    )
+                    yield migration, elapsed
+            finally:
+                # the connection goes back to the pool the app draws from
+                connection.execute(text("RESET lock_timeout"))
+                connection.execute(
+                    text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_KEY}
+                )
+
+    def _lock(self, connection):
+        """
+        Takes the migration lock, polling until the process holding it is done
+
+        A session blocked in pg_advisory_lock keeps the snapshot of its
+        statement, and CREATE INDEX CONCURRENTLY in the other process waits
+        for that snapshot to go away, so each try must return at once.
+        """
+        lock_sql = text("SELECT pg_try_advisory_lock(:key)")
+        while not connection.execute(lock_sql, {"key": MIGRATION_LOCK_KEY}).scalar():
+            logger.info("Waiting for another process to finish migrating")
+            time.sleep(self.lock_poll_seconds)
+
+    @staticmethod
+    def _applied(connection):
+        if connection.execute(text("SELECT to_regclass('schema_migrations')")).scalar() is None:
+            return {}
+        rows = connection.execute(text("SELECT version, applied_at FROM schema_migrations"))
+        return dict(rows.all())
@@ -0,0 +1,64 @@
+"""
+Connection Pool Statistics
+
+This module contains the connection pool used by the service, which
+records how long callers wait to check out a connection, and a helper
+that reports the gauges of a pool
+"""
+import threading
+import time
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+
+class InstrumentedQueuePool(QueuePool):
+    """A QueuePool that records the time spent waiting for a connection"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self._wait_stats = {
+            "checkouts": 0, "timeouts": 0, "wait_seconds": 0.0, "max_wait_seconds": 0.0
+        }
+
+    def connect(self):
+        start = time.perf_counter()
+        timed_out = False
+        try:
+            return super().connect()
+        except PoolTimeoutError:
+            timed_out = True
+            raise
+        finally:
+            self._record_checkout(time.perf_counter() - start, timed_out)
+
+    def wait_stats(self):
+        """Returns a copy of the checkout counters of this pool"""
+        with self._stats_lock:
+            return dict(self._wait_stats)
+
+    def _record_checkout(self, waited, timed_out):
+        with self._stats_lock:
+            stats = self._wait_stats
+            stats["checkouts"] += 1
+            stats["timeouts"] += int(timed_out)
+            stats["wait_seconds"] += waited
+            stats["max_wait_seconds"] = max(stats["max_wait_seconds"], waited)
+
+
+def pool_status(engine):
+    """Returns the size, usage and checkout wait gauges of an engine's pool"""
+    pool = engine.pool
+    if not isinstance(pool, QueuePool):
+        return {"pool": type(pool).__name__}
+    status = {
+        "pool": type(pool).__name__,
+        "size": pool.size(),
+        "max_overflow": pool._max_overflow,  # pylint: disable=protected-access
+        "in_use": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+    }
+    if isinstance(pool, InstrumentedQueuePool):
+        status.update(pool.wait_stats())
+    return status
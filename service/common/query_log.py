@@ -0,0 +1,68 @@
+"""
+SQL Query Timing
+
+This module times every statement sent to the database through
+SQLAlchemy, keeps a per-request count and total, and logs a structured
+line for every statement slower than SLOW_QUERY_THRESHOLD_MS
+"""
+import time
+from flask import current_app, g, has_app_context, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# statements are cut to this length in the slow query log
+MAX_STATEMENT_LENGTH = 1000
+
+
+def init_query_log(app):
+    """Counts the queries of every request and reports them in debug mode"""
+    app.before_request(_start_request)
+
+    @app.after_request
+    def add_query_headers(response):  # pylint: disable=unused-variable
+        if (app.debug or app.config.get("QUERY_COUNT_HEADER")) and "db_query_count" in g:
+            response.headers["X-DB-Query-Count"] = str(g.db_query_count)
+            response.headers["X-DB-Query-Time-Ms"] = f"{g.db_query_seconds * 1000:.2f}"
+        return response
+
+
+def _start_request():
+    g.db_query_count = 0
+    g.db_query_seconds = 0.0
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # pylint: disable=unused-argument, too-many-arguments
+    # kept on the execution context, after_cursor_execute does not run for a failed statement
+    if context is not None:
+        context.query_start = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # pylint: disable=unused-argument, too-many-arguments
+    started = getattr(context, "query_start", None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    route = None
+    if has_request_context():
+        route = request.url_rule.rule if request.url_rule else request.path
+        if "db_query_count" in g:
+            g.db_query_count += 1
+            g.db_query_seconds += elapsed
+    if has_app_context():
+        threshold = current_app.config.get("SLOW_QUERY_THRESHOLD_MS")
+        if threshold is not None and elapsed * 1000 >= threshold:
+            fields = {
+                "event": "slow_query",
+                "duration_ms": round(elapsed * 1000, 2),
+                "rows": cursor.rowcount,
+                "method": request.method if route else None,
+                "route": route,
+                "database": conn.engine.url.host,
+                "statement": statement[:MAX_STATEMENT_LENGTH],
+            }
+            current_app.logger.warning("Slow query of %.2f ms", elapsed * 1000,
+                                       extra={"fields": fields})
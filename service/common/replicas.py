@@ -0,0 +1,122 @@
+"""
+Read Replica Routing
+
+This module contains the session that sends read-only queries to a
+pool of read replicas while every write, and every read that follows a
+write in the same session, goes to the primary database
+"""
+import itertools
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from flask_sqlalchemy import SQLAlchemy, SignallingSession
+from sqlalchemy import create_engine, event, orm
+from sqlalchemy.sql import Select
+
+logger = logging.getLogger("flask.app")
+
+
+######################################################################
+#  R E P L I C A   R O U T E R
+######################################################################
+class ReplicaRouter:
+    """
+    Picks a healthy read replica round robin
+
+    A replica that fails to connect or drops its connection is ejected
+    for eject_seconds before it is tried again.
+    """
+
+    def __init__(self, uris, engine_options=None, eject_seconds=30):
+        self.engines = [create_engine(uri, **(engine_options or {})) for uri in uris]
+        self.eject_seconds = eject_seconds
+        self._ejected_until = {}
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        for engine in self.engines:
+            event.listen(engine, "handle_error", self._handle_error)
+
+    def choose(self):
+        """Returns the next healthy replica engine, or None if there is none"""
+        now = time.monotonic()
+        with self._lock:
+            healthy = [
+                engine for engine in self.engines
+                if self._ejected_until.get(engine, 0) <= now
+            ]
+            if not healthy:
+                return None
+            return healthy[next(self._counter) % len(healthy)]
+
+    def eject(self, engine):
+        """Stops routing reads to engine for eject_seconds"""
+        logger.warning("Ejecting read replica %s for %ss", engine.url, self.eject_seconds)
+        with self._lock:
+            self._ejected_until[engine] = time.monotonic() + self.eject_seconds
+
+    def healthy_count(self):
+        """Returns the number of replicas that are not ejected"""
+        now = time.monotonic()
+        with self._lock:
+            return sum(1 for engine in self.engines if self._ejected_until.get(engine, 0) <= now)
+
+    def dispose(self, close=True):
+        """Closes the connection pool of every replica, or just drops it when close is False"""
+        for engine in self.engines:
+            engine.dispose(close=close)
+
+    def _handle_error(self, context):
+        if context.is_disconnect or context.connection is None:
+            self.eject(context.engine)
+
+
+######################################################################
+#  R O U T I N G   S E S S I O N
+######################################################################
+class RoutingSession(SignallingSession):  # pylint: disable=too-few-public-methods
+    """
+    A session that reads from a replica until it writes
+
+    Once anything other than a plain SELECT runs, the session sticks to
+    the primary so a request always reads its own writes.
+    """
+
+    def __init__(self, db, **options):
+        self.router = db.replica_router
+        self.use_primary = False
+        super().__init__(db, **options)
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):  # pylint: disable=unused-argument
+        if self.router is not None and not self.use_primary:
+            if not self._flushing and _is_read_only(clause):
+                engine = self.router.choose()
+                if engine is not None:
+                    return engine
+            else:
+                self.use_primary = True
+        return super().get_bind(mapper, clause)
+
+    @contextmanager
+    def primary(self):
+        """Sends the reads made inside the block to the primary"""
+        use_primary = self.use_primary
+        self.use_primary = True
+        try:
+            yield self
+        finally:
+            self.use_primary = use_primary
+
+
+def _is_read_only(clause):
+    """Returns True if clause is a SELECT that takes no row locks"""
+    return isinstance(clause, Select) and clause._for_update_arg is None  # pylint: disable=protected-access
+
+
+class RoutingSQLAlchemy(SQLAlchemy):
+    """Flask-SQLAlchemy whose sessions route reads to replica_router"""
+
+    replica_router = None
+
+    def create_session(self, options):
+        return orm.sessionmaker(class_=RoutingSession, db=self, **options)
@@ -15,9 +15,70 @@ if not DATABASE_URI:
     DATABASE_HOST = os.getenv("DATABASE_HOST", "localhost")
     DATABASE_URI = f"postgresql://{DATABASE_USER}:{DATABASE_PASSWORD}@{DATABASE_HOST}:5432/{DATABASE_NAME}"
 
+# Optional comma separated read replicas that serve read-only queries
+DATABASE_REPLICA_URIS = [
+    uri.strip() for uri in os.getenv("DATABASE_REPLICA_URIS", "").split(",") if uri.strip()
+]
+DATABASE_REPLICA_EJECT_SECONDS = int(os.getenv("DATABASE_REPLICA_EJECT_SECONDS", "30"))
+
 # Configure SQLAlchemy
 SQLALCHEMY_DATABASE_URI = DATABASE_URI
 SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+# Connection pool of each worker process
+SQLALCHEMY_ENGINE_OPTIONS = {
+    "pool_size": int(os.getenv("DATABASE_POOL_SIZE", "5")),
+    "max_overflow": int(os.getenv("DATABASE_MAX_OVERFLOW", "10")),
+    "pool_timeout": float(os.getenv("DATABASE_POOL_TIMEOUT", "30")),
+    "pool_recycle": int(os.getenv("DATABASE_POOL_RECYCLE", "1800")),
+    "pool_pre_ping": os.getenv("DATABASE_POOL_PRE_PING", "true").lower() in ("true", "1", "yes"),
+}
+
+# Log statements slower than this, and report query counts in responses
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "200"))
+QUERY_COUNT_HEADER = os.getenv("QUERY_COUNT_HEADER", "false").lower() in ("true", "1", "yes")
+
+# Keyset pagination for list endpoints
+DEFAULT_PAGE_SIZE = int(os.getenv("DEFAULT_PAGE_SIZE", "100"))
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "1000"))
+
+# Number of rows fetched per round trip when streaming a listing
+STREAM_BATCH_SIZE = int(os.getenv("STREAM_BATCH_SIZE", "1000"))
+
+# Batch endpoints: most items per request and rows per multi-row statement
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "5000"))
+BULK_INSERT_CHUNK_SIZE = int(os.getenv("BULK_INSERT_CHUNK_SIZE", "500"))
+
+# Rows copied per round trip by the COPY based export
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "50000"))
+
+# Read-through cache for single account lookups: none, memory or redis
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "none")
+CACHE_TTL = int(os.getenv("CACHE_TTL", "60"))
+CACHE_MAX_SIZE = int(os.getenv("CACHE_MAX_SIZE", "10000"))
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0")
+# Seconds Redis is skipped for reads after a command to it fails
+CACHE_REDIS_EJECT_SECONDS = float(os.getenv("CACHE_REDIS_EJECT_SECONDS", "5"))
+
+# Logging: json or text output, the bounded queue in front of the log
+# writer, and the share of INFO records kept for the hot routes listed
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "1.0"))
+LOG_SAMPLED_ROUTES = [
+    route.strip() for route in os.getenv("LOG_SAMPLED_ROUTES", "").split(",") if route.strip()
+]
+
+# Access log: share of successful requests logged; errors and requests
+# slower than the threshold are always logged
+ACCESS_LOG_SAMPLE_RATE = float(os.getenv("ACCESS_LOG_SAMPLE_RATE", "1.0"))
+SLOW_REQUEST_THRESHOLD_MS = float(os.getenv("SLOW_REQUEST_THRESHOLD_MS", "1000"))
+
+# Readiness probe: seconds a result is reused, and the database latency
+# and share of the pool in use above which the service reports DEGRADED
+HEALTH_CACHE_SECONDS = float(os.getenv("HEALTH_CACHE_SECONDS", "2"))
+HEALTH_DB_LATENCY_THRESHOLD_MS = float(os.getenv("HEALTH_DB_LATENCY_THRESHOLD_MS", "100"))
+HEALTH_POOL_SATURATION_THRESHOLD = float(os.getenv("HEALTH_POOL_SATURATION_THRESHOLD", "0.8"))
+
 # Secret for session management
 SECRET_KEY = os.getenv("SECRET_KEY", "s3cr3t-key-shhhh")
@@ -0,0 +1,42 @@
+"""
+Account Schema Migrations
+
+The changes made to the account table since it was first deployed, in
+the order they are applied by flask db-migrate. A database made by
+flask db-init already has every one of them, so they only add what is
+missing and are simply recorded as applied there.
+"""
+from service.common.migrations import Migration
+
+
+def add_version_column(editor):
+    """Adds the version used for ETags; its constant default needs no table rewrite"""
+    editor.add_column("account", "version", "integer NOT NULL DEFAULT 1")
+
+
+def index_names(editor):
+    """Indexes the names the list endpoint filters on"""
+    editor.create_index("ix_account_name", "account", "name")
+
+
+def index_emails(editor):
+    """
+    Indexes the emails ignoring case, making them unique
+
+    The build fails while two accounts share an email; remove the
+    duplicates and migrate again.
+    """
+    editor.create_index("ix_account_email_lower", "account", "lower(email)", unique=True)
+
+
+def index_date_joined(editor):
+    """Indexes the join dates the list endpoint filters on"""
+    editor.create_index("ix_account_date_joined", "account", "date_joined")
+
+
+MIGRATIONS = [
+    Migration(1, "Add the account version column", add_version_column),
+    Migration(2, "Index account names", index_names),
+    Migration(3, "Index account emails ignoring case", index_emails),
+    Migration(4, "Index account join dates", index_date_joined),
+]
@@ -3,31 +3,107 @@ Models for Account
 
 All of the models are stored in this module
 """
+import csv
+import io
 import logging
+from contextlib import nullcontext
 from datetime import date
-from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import any_, column, literal, text, values as sql_values
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.orm import make_transient_to_detached
+from service.common.cache import NullCache, create_cache
+from service.common.pool_stats import InstrumentedQueuePool
+from service.common.replicas import ReplicaRouter, RoutingSQLAlchemy
 
 logger = logging.getLogger("flask.app")
 
 # Create the SQLAlchemy object to be initialized later in init_db()
-db = SQLAlchemy()
+db = RoutingSQLAlchemy()
 
 
 class DataValidationError(Exception):
     """Used for an data validation errors when deserializing"""
 
 
+# The Account columns that clients can write
+WRITABLE_COLUMNS = ("name", "email", "address", "phone_number", "date_joined")
+
+# The largest value of a PostgreSQL integer column
+MAX_INTEGER = 2 ** 31 - 1
+
+# The largest Account ID accepted from clients, a 64-bit integer that every JSON encoder handles
+MAX_ID = 2 ** 63 - 1
+
+# The Account fields returned to clients, and selectable with ?fields=
+READABLE_COLUMNS = ("id",) + WRITABLE_COLUMNS
+
+# The staging table is emptied at the end of every transaction
+IMPORT_STAGING_SQL = """
+CREATE TEMPORARY TABLE IF NOT EXISTS account_import (
+    name text, email text, address text, phone_number text, date_joined date
+) ON COMMIT DELETE ROWS
+"""
+
+IMPORT_INSERT_SQL = """
+INSERT INTO account (name, email, address, phone_number, date_joined)
+SELECT DISTINCT ON (lower(s.email))
+    s.name, s.email, s.address, s.phone_number, COALESCE(s.date_joined, CURRENT_DATE)
+FROM account_import s
+WHERE s.name IS NOT NULL AND length(s.name) <= 64
+  AND s.email IS NOT NULL AND length(s.email) <= 64
+  AND s.address IS NOT NULL AND length(s.address) <= 256
+  AND (s.phone_number IS NULL OR length(s.phone_number) <= 32)
+  AND NOT EXISTS (SELECT 1 FROM account a WHERE lower(a.email) = lower(s.email))
+ORDER BY lower(s.email)
+ON CONFLICT DO NOTHING
+"""
+
+
+# Draws :count ids from the sequence of a table's id column
+NEXT_IDS_SQL = text(
+    "SELECT nextval(pg_get_serial_sequence(:table, 'id')) FROM generate_series(1, :count)"
+)
+
+EXPORT_COLUMNS = READABLE_COLUMNS
+
+# Finds the last ID of the next export chunk
+EXPORT_CHUNK_END_SQL = "SELECT id FROM account WHERE id > %s ORDER BY id OFFSET %s LIMIT 1"
+
+# COPY output formats keyed by export format; the NDJSON rows are single
+# json values so quoting is switched off by using control characters
+EXPORT_COPY_OPTIONS = {
+    "csv": "FORMAT csv",
+    "ndjson": "FORMAT csv, QUOTE E'\\x01', DELIMITER E'\\x02'",
+}
+
+
 def init_db(app):
     """Initialize the SQLAlchemy app"""
     Account.init_db(app)
 
 
+def dispose_after_fork(app):
+    """
+    Drops the pooled connections a forked process inherited from its parent
+
+    The connections are left open for the parent to keep using, and the
+    child opens its own on first use.
+    """
+    logger.info("Discarding the database connections of the parent process")
+    db.get_engine(app).dispose(close=False)
+    if db.replica_router is not None:
+        db.replica_router.dispose(close=False)
+
+
 ######################################################################
 #  P E R S I S T E N T   B A S E   M O D E L
 ######################################################################
-class PersistentBase:
+class PersistentBase:  # pylint: disable=too-many-public-methods
     """Base class added persistent methods"""
 
+    # read-through cache for find(), replaced in init_db()
+    cache = NullCache()
+
     def __init__(self):
         self.id = None  # pylint: disable=invalid-name
 
@@ -40,28 +116,256 @@ class PersistentBase:
         db.session.add(self)
         db.session.commit()
 
+    def column_values(self):
+        """Returns the column values used to INSERT or UPDATE this record
+
+        The primary key and version are left to the database.
+        """
+        return {
+            column.name: getattr(self, column.name)
+            for column in self.__table__.columns
+            if column.name not in ("id", "version")
+        }
+
+    def etag(self):
+        """Returns an entity tag that changes every time the record is updated"""
+        return f"{self.id}-{self.version}"
+
     def update(self):
         """
         Updates a Account to the database
         """
         logger.info("Updating %s", self.name)
         db.session.commit()
+        self.cache.delete(self.cache_key(self.id))
 
     def delete(self):
         """Removes a Account from the data store"""
         logger.info("Deleting %s", self.name)
         db.session.delete(self)
         db.session.commit()
+        self.cache.delete(self.cache_key(self.id))
+
+    @classmethod
+    def create_many(cls, records, chunk_size=500):
+        """
+        Creates many records in a single transaction
+
+        The ids of each chunk are drawn from the sequence first and the
+        chunk is written with one multi-row INSERT ... ON CONFLICT DO NOTHING
+        RETURNING id. Records that would break a unique index are skipped
+        and keep an id of None.
+
+        Args:
+            records (list): the records to create
+            chunk_size (int): the most rows to send in a single INSERT
+
+        Returns:
+            list: the new id of each record, or None if it was skipped
+        """
+        logger.info("Creating %s records", len(records))
+        table = cls.__table__
+        try:
+            for start in range(0, len(records), chunk_size):
+                chunk = records[start:start + chunk_size]
+                new_ids = db.session.execute(
+                    NEXT_IDS_SQL, {"table": table.name, "count": len(chunk)}
+                ).scalars().all()
+                rows = [
+                    dict(record.column_values(), id=new_id)
+                    for record, new_id in zip(chunk, new_ids)
+                ]
+                statement = insert(table).values(rows).on_conflict_do_nothing()
+                statement = statement.returning(table.c.id)
+                # the skipped rows are not returned, so their ids go unused
+                inserted = set(db.session.execute(statement).scalars())
+                for record, new_id in zip(chunk, new_ids):
+                    record.id = new_id if new_id in inserted else None
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return [record.id for record in records]
+
+    @classmethod
+    def update_by_id(cls, by_id, values, versions=None):
+        """
+        Updates a record with a single UPDATE ... RETURNING statement
+
+        Args:
+            by_id (int): the ID of the record to update
+            values (dict): the new column values
+            versions (list): only update the record if it is at one of these versions
+
+        Returns:
+            the updated record, or None if no record matched
+        """
+        logger.info("Updating id %s where version in %s", by_id, versions)
+        row = cls._execute_and_commit(cls.update_statement(by_id, values, versions))
+        cls.cache.delete(cls.cache_key(by_id))
+        return cls.from_row(row) if row else None
+
+    @classmethod
+    def delete_by_id(cls, by_id, versions=None):
+        """
+        Deletes a record with a single DELETE ... RETURNING statement
+
+        Args:
+            by_id (int): the ID of the record to delete
+            versions (list): only delete the record if it is at one of these versions
+
+        Returns:
+            True if a record was deleted
+        """
+        logger.info("Deleting id %s where version in %s", by_id, versions)
+        row = cls._execute_and_commit(cls.delete_statement(by_id, versions))
+        cls.cache.delete(cls.cache_key(by_id))
+        return row is not None
+
+    @classmethod
+    def update_statement(cls, by_id, values, versions=None):
+        """Returns the UPDATE ... RETURNING that bumps the version of a record"""
+        table = cls.__table__
+        statement = table.update().where(table.c.id == by_id)
+        if versions is not None:
+            statement = statement.where(table.c.version.in_(versions))
+        return statement.values(version=table.c.version + 1, **values).returning(*table.c)
+
+    @classmethod
+    def delete_statement(cls, by_id, versions=None):
+        """Returns the DELETE ... RETURNING id of a record"""
+        table = cls.__table__
+        statement = table.delete().where(table.c.id == by_id)
+        if versions is not None:
+            statement = statement.where(table.c.version.in_(versions))
+        return statement.returning(table.c.id)
+
+    @classmethod
+    def update_many(cls, changes, chunk_size=500):
+        """
+        Updates many records in one transaction with UPDATE ... FROM (VALUES ...)
+
+        The changes that write the same columns, and that either all check
+        a version or all do not, share their statements.
+
+        Args:
+            changes (list): (id, values, version) tuples, where a version of
+                None updates the record whatever its version is
+            chunk_size (int): the most rows to send in a single UPDATE
+
+        Returns:
+            dict: the updated row of every record that matched, keyed by ID
+        """
+        logger.info("Updating %s records", len(changes))
+        groups = {}
+        for by_id, new_values, version in changes:
+            columns = tuple(sorted(new_values))
+            row = (by_id,) if version is None else (by_id, version)
+            row += tuple(new_values[name] for name in columns)
+            groups.setdefault((columns, version is not None), []).append(row)
+        updated = {}
+        try:
+            for (columns, versioned), rows in groups.items():
+                for start in range(0, len(rows), chunk_size):
+                    chunk = rows[start:start + chunk_size]
+                    statement = cls._update_from_values(columns, versioned, chunk)
+                    updated.update((row.id, row) for row in db.session.execute(statement))
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        cls.cache.delete(*(cls.cache_key(by_id) for by_id in updated))
+        return updated
+
+    @classmethod
+    def _update_from_values(cls, columns, versioned, rows):
+        """Returns an UPDATE that sets columns from the (id, [version,] *columns) rows"""
+        table = cls.__table__
+        names = ("id", "version") + columns if versioned else ("id",) + columns
+        source = sql_values(*(column(name, table.c[name].type) for name in names), name="changes")
+        source = source.data(rows)
+        statement = table.update().where(table.c.id == source.c.id)
+        if versioned:
+            statement = statement.where(table.c.version == source.c.version)
+        changed = {name: source.c[name] for name in columns}
+        return statement.values(version=table.c.version + 1, **changed).returning(*table.c)
+
+    @classmethod
+    def delete_many(cls, ids, chunk_size=500):
+        """
+        Deletes many records in one transaction with DELETE ... WHERE id = ANY(...)
+
+        Args:
+            ids (list): the IDs of the records to delete
+            chunk_size (int): the most IDs to send in a single DELETE
+
+        Returns:
+            set: the IDs of the records that were deleted
+        """
+        logger.info("Deleting %s records", len(ids))
+        table = cls.__table__
+        deleted = set()
+        try:
+            for start in range(0, len(ids), chunk_size):
+                chunk = ids[start:start + chunk_size]
+                statement = table.delete().where(cls.id_in(chunk)).returning(table.c.id)
+                deleted.update(row.id for row in db.session.execute(statement))
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        cls.cache.delete(*(cls.cache_key(by_id) for by_id in deleted))
+        return deleted
+
+    @classmethod
+    def id_in(cls, ids):
+        """Returns the condition id = ANY(:ids), with the IDs sent as one array parameter"""
+        # an ID out of the range of the integer column cannot match and would fail the cast
+        ids = [by_id for by_id in ids if -MAX_INTEGER - 1 <= by_id <= MAX_INTEGER]
+        return cls.__table__.c.id == any_(literal(ids, ARRAY(db.Integer)))
+
+    @staticmethod
+    def _execute_and_commit(statement):
+        """Executes a statement in its own transaction and returns the first row"""
+        try:
+            row = db.session.execute(statement).first()
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return row
+
+    @classmethod
+    def from_row(cls, row):
+        """Attaches a record built from a full row of column values to the session"""
+        record = cls(**row._mapping)  # pylint: disable=protected-access
+        make_transient_to_detached(record)
+        return db.session.merge(record, load=False)
 
     @classmethod
     def init_db(cls, app):
-        """Initializes the database session"""
+        """
+        Initializes the database session without connecting to the database
+
+        The tables are made by the flask db-init command, not here.
+        """
         logger.info("Initializing database")
         cls.app = app
-        # This is where we initialize SQLAlchemy from the Flask app
+        PersistentBase.cache = create_cache(app.config)
+        engine_options = app.config.setdefault("SQLALCHEMY_ENGINE_OPTIONS", {})
+        engine_options.setdefault("poolclass", InstrumentedQueuePool)
+        if db.replica_router is not None:
+            db.replica_router.dispose()
+        db.replica_router = None
+        if app.config.get("DATABASE_REPLICA_URIS"):
+            db.replica_router = ReplicaRouter(
+                app.config["DATABASE_REPLICA_URIS"],
+                engine_options,
+                app.config["DATABASE_REPLICA_EJECT_SECONDS"],
+            )
+        # This is where we initialize SQLAlchemy from the Flask app, the
+        # engine is created and connects on first use
         db.init_app(app)
-        app.app_context().push()
-        db.create_all()  # make our sqlalchemy tables
 
     @classmethod
     def all(cls):
@@ -73,7 +377,102 @@ class PersistentBase:
     def find(cls, by_id):
         """Finds a record by it's ID"""
         logger.info("Processing lookup for id %s ...", by_id)
-        return cls.query.get(by_id)
+        key = cls.cache_key(by_id)
+        data = cls.cache.get(key)
+        if data is not None:
+            return cls.from_cache(data)
+        with cls.cache_source():
+            record = cls.query.get(by_id)
+        if record is not None:
+            cls.cache.set(key, dict(record.serialize(), version=record.version))
+        return record
+
+    @classmethod
+    def cache_source(cls):
+        """
+        Returns a context in which the reads that fill the cache go to the primary
+
+        A replica may not have replayed the write that just invalidated a
+        record, and its old row would then be cached for CACHE_TTL seconds.
+        """
+        if isinstance(cls.cache, NullCache):
+            return nullcontext()
+        return db.session().primary()
+
+    @classmethod
+    def cache_key(cls, by_id):
+        """Returns the cache key of the record with the given ID"""
+        return f"{cls.__tablename__}:{by_id}"
+
+    @classmethod
+    def from_cache(cls, data):
+        """Attaches a record rebuilt from its cached serialized form to the session"""
+        record = cls().deserialize(data)
+        record.id = data["id"]
+        record.version = data["version"]
+        make_transient_to_detached(record)
+        return db.session.merge(record, load=False)
+
+    @classmethod
+    def find_by_ids(cls, ids, query=None):
+        """Returns the records with any of the given IDs
+
+        The statement is the same however many IDs are asked for.
+
+        Args:
+            ids (list): the IDs of the records you want to match
+            query (Query): an optional query to narrow down
+        """
+        logger.info("Processing lookup for %s ids ...", len(ids))
+        if query is None:
+            query = cls.query
+        return query.filter(cls.id_in(ids))
+
+    @classmethod
+    def project(cls, columns, query=None):
+        """Returns query narrowed to the named columns
+
+        The query yields lightweight rows instead of records, so nothing
+        is added to the session's identity map.
+
+        Args:
+            columns (iterable): the names of the columns to select
+            query (Query): an optional filtered query to narrow down
+        """
+        if query is None:
+            query = cls.query
+        return query.with_entities(*(getattr(cls, name) for name in columns))
+
+    @classmethod
+    def find_page(cls, after_id=None, limit=100, query=None):
+        """Returns up to limit records ordered by ID that come after after_id
+
+        This is keyset pagination on the primary key, so every page is an
+        indexed range scan no matter how deep the client pages.
+
+        Args:
+            after_id (int): the last ID of the previous page, or None for the first page
+            limit (int): the maximum number of records to return
+            query (Query): an optional filtered query to page through
+        """
+        logger.info("Processing page of %s records after id %s ...", limit, after_id)
+        if query is None:
+            query = cls.query
+        if after_id is not None:
+            query = query.filter(cls.id > after_id)
+        return query.order_by(cls.id).limit(limit).all()
+
+    @classmethod
+    def stream(cls, batch_size=1000, query=None):
+        """Returns an iterable over all of the records ordered by ID
+
+        The rows are fetched batch_size at a time from a server side cursor
+        so memory use stays constant no matter how large the table is.
+        """
+        logger.info("Streaming all records in batches of %s", batch_size)
+        if query is None:
+            query = cls.query
+        return query.order_by(cls.id).yield_per(batch_size)
 
 
 ######################################################################
@@ -93,19 +492,34 @@ class Account(db.Model, PersistentBase):
     address = db.Column(db.String(256))
     phone_number = db.Column(db.String(32), nullable=True)  # phone number is optional
     date_joined = db.Column(db.Date(), nullable=False, default=date.today())
+    # bumped by SQLAlchemy on every update and used for ETags
+    version = db.Column(db.Integer, nullable=False, server_default="1")
+
+    __mapper_args__ = {"version_id_col": version}
+    __table_args__ = (
+        db.Index("ix_account_name", name),
+        db.Index("ix_account_email_lower", db.func.lower(email), unique=True),
+        db.Index("ix_account_date_joined", date_joined),
+    )
 
     def __repr__(self):
         return f"<Account {self.name} id=[{self.id}]>"
 
     def serialize(self):
         """Serializes a Account into a dictionary"""
+        data = self.as_dict()
+        data["date_joined"] = self.date_joined.isoformat()
+        return data
+
+    def as_dict(self):
+        """Returns the fields of a Account, keeping date_joined as a date for the JSON codec"""
         return {
             "id": self.id,
             "name": self.name,
             "email": self.email,
             "address": self.address,
             "phone_number": self.phone_number,
-            "date_joined": self.date_joined.isoformat()
+            "date_joined": self.date_joined,
         }
 
     def deserialize(self, data):
@@ -120,6 +534,10 @@ class Account(db.Model, PersistentBase):
             self.email = data["email"]
             self.address = data["address"]
             self.phone_number = data.get("phone_number")
+            for field in ("name", "email", "address", "phone_number"):
+                value = getattr(self, field)
+                if value is not None or field != "phone_number":
+                    self.check_string(field, value)
             date_joined = data.get("date_joined")
             if date_joined:
                 self.date_joined = date.fromisoformat(date_joined)
@@ -132,14 +550,223 @@ class Account(db.Model, PersistentBase):
                 "Invalid Account: body of request contained "
                 "bad or no data - " + error.args[0]
             ) from error
+        except ValueError as error:
+            raise DataValidationError("Invalid Account: " + error.args[0]) from error
         return self
 
     @classmethod
-    def find_by_name(cls, name):
+    def check_string(cls, field, value):
+        """Raises a DataValidationError unless value is a string that fits its column"""
+        if not isinstance(value, str):
+            raise DataValidationError(f"Invalid Account: {field} must be a string")
+        length = cls.__table__.c[field].type.length
+        if length is not None and len(value) > length:
+            raise DataValidationError(
+                f"Invalid Account: {field} must be at most {length} characters"
+            )
+
+    @staticmethod
+    def patch_values(data):
+        """
+        Validates a JSON Merge Patch of an Account
+
+        Args:
+            data (dict): the fields to change, phone_number may be null to remove it
+
+        Returns:
+            dict: the column values the patch changes
+        """
+        if not isinstance(data, dict) or not data:
+            raise DataValidationError("Invalid Account: patch must be a non-empty JSON object")
+        values = {}
+        for field, value in data.items():
+            if field not in WRITABLE_COLUMNS:
+                raise DataValidationError(f"Invalid Account: {field} can not be patched")
+            if value is None:
+                if field != "phone_number":
+                    raise DataValidationError(f"Invalid Account: {field} can not be removed")
+            elif not isinstance(value, str):
+                raise DataValidationError(f"Invalid Account: {field} must be a string")
+            elif field != "date_joined":
+                Account.check_string(field, value)
+            else:
+                try:
+                    value = date.fromisoformat(value)
+                except ValueError as error:
+                    raise DataValidationError("Invalid Account: " + error.args[0]) from error
+            values[field] = value
+        return values
+
+    @classmethod
+    def import_rows(cls, rows, batch_size=10000):
+        """
+        Bulk loads Accounts with PostgreSQL COPY
+
+        Each batch is copied into a temporary staging table and only the rows
+        that have the required fields and an email address that is not already
+        taken (ignoring case) are moved into the account table.
+
+        Args:
+            rows (iterable): dictionaries of Account fields
+            batch_size (int): the number of rows to COPY per transaction
+
+        Yields:
+            (int, int): the rows read and the rows inserted for each batch
+        """
+        logger.info("Importing Accounts in batches of %s", batch_size)
+        connection = db.engine.raw_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute(IMPORT_STAGING_SQL)
+            batch = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    yield len(batch), cls._import_batch(cursor, batch)
+                    connection.commit()
+                    batch = []
+            if batch:
+                yield len(batch), cls._import_batch(cursor, batch)
+                connection.commit()
+            cursor.execute("DROP TABLE IF EXISTS account_import")
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            connection.close()
+
+    @staticmethod
+    def _import_batch(cursor, rows):
+        """Copies one batch of rows into the staging table and then into account"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            if not isinstance(row, dict):
+                continue  # a line of an NDJSON file that is not a JSON object
+            values = [row.get(column) or None for column in WRITABLE_COLUMNS]
+            try:
+                if values[-1]:
+                    values[-1] = date.fromisoformat(values[-1])
+            except (TypeError, ValueError):
+                continue  # a bad date_joined can not be loaded into the staging table
+            writer.writerow(values)
+        buffer.seek(0)
+        columns = ", ".join(WRITABLE_COLUMNS)
+        cursor.copy_expert(f"COPY account_import ({columns}) FROM STDIN WITH (FORMAT csv)", buffer)
+        cursor.execute(IMPORT_INSERT_SQL)
+        return cursor.rowcount
+
+    @classmethod
+    def export_rows(cls, file_format="csv", chunk_size=50000):
+        """
+        Streams every Account out of PostgreSQL with COPY ... TO STDOUT
+
+        The rows are copied chunk_size at a time in ID order and handed to
+        the caller as raw bytes without building any ORM objects.
+
+        Args:
+            file_format (string): either csv (with a header line) or ndjson
+            chunk_size (int): the number of rows to COPY per round trip
+
+        Yields:
+            bytes: the next chunk of the export
+        """
+        logger.info("Exporting Accounts as %s in chunks of %s", file_format, chunk_size)
+        if file_format == "csv":
+            select = ", ".join(EXPORT_COLUMNS)
+            yield (",".join(EXPORT_COLUMNS) + "\n").encode("utf-8")
+        else:
+            pairs = ", ".join(f"'{name}', {name}" for name in EXPORT_COLUMNS)
+            select = f"json_build_object({pairs})"
+        copy_sql = (
+            f"COPY (SELECT {select} FROM account WHERE id > %s AND id <= %s ORDER BY id) "
+            f"TO STDOUT WITH ({EXPORT_COPY_OPTIONS[file_format]})"
+        )
+        connection = db.engine.raw_connection()
+        try:
+            cursor = connection.cursor()
+            last_id = 0
+            while last_id is not None:
+                cursor.execute(EXPORT_CHUNK_END_SQL, (last_id, chunk_size - 1))
+                row = cursor.fetchone()
+                end_id = row[0] if row else None
+                buffer = io.BytesIO()
+                sql = cursor.mogrify(copy_sql, (last_id, end_id or 2**31 - 1)).decode("utf-8")
+                cursor.copy_expert(sql, buffer)
+                if buffer.tell():
+                    yield buffer.getvalue()
+                last_id = end_id
+        finally:
+            connection.rollback()
+            connection.close()
+
+    @classmethod
+    def find_values(cls, by_id):
+        """Finds the serialized fields and version of an Account by its ID
+
+        Unlike find, no Account is built, so the cached form is returned
+        as is and a cache miss only selects the columns.
+        """
+        logger.info("Processing values lookup for id %s ...", by_id)
+        key = cls.cache_key(by_id)
+        data = cls.cache.get(key)
+        if data is None:
+            with cls.cache_source():
+                row = cls.project(READABLE_COLUMNS + ("version",)).filter(cls.id == by_id).first()
+            if row is None:
+                return None
+            data = cls.serialize_row(row)
+            cls.cache.set(key, data)
+        return data
+
+    @staticmethod
+    def serialize_row(row):
+        """Serializes a row of Account columns like serialize does, keeping any version"""
+        data = row._asdict()
+        data["date_joined"] = row.date_joined.isoformat()
+        return data
+
+    @classmethod
+    def find_by_name(cls, name, query=None):
         """Returns all Accounts with the given name
 
         Args:
             name (string): the name of the Accounts you want to match
+            query (Query): an optional query to narrow down
         """
         logger.info("Processing name query for %s ...", name)
-        return cls.query.filter(cls.name == name)
+        if query is None:
+            query = cls.query
+        return query.filter(cls.name == name)
+
+    @classmethod
+    def find_by_email(cls, email, query=None):
+        """Returns a query of the Account with the given email ignoring case
+
+        Args:
+            email (string): the email of the Account you want to match
+            query (Query): an optional query to narrow down
+        """
+        logger.info("Processing email query for %s ...", email)
+        if query is None:
+            query = cls.query
+        return query.filter(db.func.lower(cls.email) == email.lower())
+
+    @classmethod
+    def find_joined_between(cls, start=None, end=None, query=None):
+        """Returns all Accounts that joined between two dates
+
+        Args:
+            start (date): the first day to include, or None for no lower bound
+            end (date): the last day to include, or None for no upper bound
+            query (Query): an optional query to narrow down
+        """
+        logger.info("Processing date joined query for %s to %s ...", start, end)
+        if query is None:
+            query = cls.query
+        if start is not None:
+            query = query.filter(cls.date_joined >= start)
+        if end is not None:
+            query = query.filter(cls.date_joined <= end)
+        return query
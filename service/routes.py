@@ -3,26 +3,60 @@ Account Service
 
 This microservice handles the lifecycle of Accounts
 """
+import base64
+import binascii
+import hashlib
+import json
+from datetime import date
+
 # pylint: disable=unused-import
 from flask import jsonify, request, make_response, abort, url_for   # noqa; F401
-from service.models import Account
-from service.common import status  # HTTP Status Codes
-from . import app  # Import Flask application
+from flask import Blueprint, Response, stream_with_context
+from flask import current_app as app  # the Flask application serving the request
+from service.models import MAX_ID, MAX_INTEGER, READABLE_COLUMNS, Account, DataValidationError, db
+from service.common import json_codec, status  # HTTP Status Codes
+from service.common import health as health_checks
+from service.common.json_codec import json_response
+from service.common.pool_stats import pool_status
+
+api = Blueprint("api", __name__)
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+EXPORT_MEDIA_TYPES = {"csv": "text/csv", "ndjson": NDJSON_MEDIA_TYPE}
 
 
 ############################################################
 # Health Endpoint
 ############################################################
-@app.route("/health")
+@api.route("/health")
+@api.route("/health/live")
 def health():
-    """Health Status"""
+    """Health Status, without touching the database so a slow one never restarts the pod"""
     return jsonify(dict(status="OK")), status.HTTP_200_OK
 
 
+@api.route("/health/ready")
+def ready():
+    """Readiness of the database and the connection pool, 503 when requests would fail"""
+    result = health_checks.readiness(app)
+    if result["status"] == health_checks.DOWN:
+        return jsonify(result), status.HTTP_503_SERVICE_UNAVAILABLE
+    return jsonify(result), status.HTTP_200_OK
+
+
+############################################################
+# Connection Pool Statistics
+############################################################
+@api.route("/stats/pool")
+def pool_stats():
+    """Database connection pool gauges of this worker"""
+    return jsonify(pool_status(db.engine)), status.HTTP_200_OK
+
+
 ######################################################################
 # GET INDEX
 ######################################################################
-@app.route("/")
+@api.route("/")
 def index():
     """Root URL response"""
     return (
@@ -38,13 +72,13 @@ def index():
 ######################################################################
 # CREATE A NEW ACCOUNT
 ######################################################################
-@app.route("/accounts", methods=["POST"])
+@api.route("/accounts", methods=["POST"])
 def create_accounts():
     """
     Creates an Account
     This endpoint will create an Account based the data in the body that is posted
     """
-    app.logger.info("Request to create an Account")
+    app.logger.debug("Request to create an Account")
     check_content_type("application/json")
     account = Account()
     account.deserialize(request.get_json())
@@ -58,89 +92,584 @@ def create_accounts():
     )
 
 
+######################################################################
+# CREATE MANY ACCOUNTS
+######################################################################
+@api.route("/accounts:batch", methods=["POST"])
+def create_accounts_batch():
+    """
+    Creates many Accounts
+    This endpoint will create every valid Account in the JSON array that is
+    posted in a single transaction and return a result for each item
+    """
+    app.logger.debug("Request to create a batch of Accounts")
+    check_content_type("application/json")
+    items = get_batch_items()
+
+    results = [None] * len(items)
+    accounts = []
+    for position, item in enumerate(items):
+        try:
+            accounts.append((position, Account().deserialize(item)))
+        except DataValidationError as error:
+            results[position] = {"status": status.HTTP_400_BAD_REQUEST, "error": str(error)}
+
+    Account.create_many([account for _, account in accounts], app.config["BULK_INSERT_CHUNK_SIZE"])
+    created = 0
+    for position, account in accounts:
+        if account.id is None:
+            error = "Email is already in use"
+            results[position] = {"status": status.HTTP_409_CONFLICT, "error": error}
+        else:
+            results[position] = {"status": status.HTTP_201_CREATED, "account": account.serialize()}
+            created += 1
+
+    app.logger.debug("Created %s of %s Accounts", created, len(items))
+    return jsonify(results), status.HTTP_200_OK
+
+
 ######################################################################
 # LIST ALL ACCOUNTS
 ######################################################################
-@app.route("/accounts", methods=["GET"])
+@api.route("/accounts", methods=["GET"])
 def list_accounts():
     """
-    List all Accounts
-    This endpoint will return a list of all the accounts as a dictionary
+    List Accounts
+    This endpoint will return one page of accounts ordered by ID. Use the
+    limit query parameter to size the page and pass the cursor from the
+    Link / X-Next-Cursor response headers to fetch the next one. The
+    accounts can be filtered with the name, email, joined_after and
+    joined_before query parameters, or read by ID with id=1,2,3.
+    """
+    app.logger.debug("Request to list accounts")
+    fields = get_fields()
+    if "id" in request.args:
+        return find_accounts_by_id(get_id_list(), fields)
+    query = get_account_query()
+    if request.args.get("stream") in ("1", "true"):
+        return stream_accounts(query, fields, ndjson=False)
+    best = request.accept_mimetypes.best_match(["application/json", NDJSON_MEDIA_TYPE])
+    if best == NDJSON_MEDIA_TYPE:
+        return stream_accounts(query, fields, ndjson=True)
+
+    limit = get_page_size()
+    after_id = decode_cursor(request.args.get("cursor"))
+
+    # only the requested columns are selected, plus what the cursor and ETag need
+    columns = dict.fromkeys(("id", "version") + fields)
+    query = Account.project(columns, query)
+    # fetch one extra row to find out if there is a next page
+    rows = Account.find_page(after_id, limit + 1, query)
+    rows, headers = next_page(
+        rows, limit, request.args, lambda args: url_for(".list_accounts", **args)
+    )
+
+    app.logger.debug("Return a list of %s Accounts.", len(rows))
+    return conditional_response(
+        page_etag(rows, fields),
+        lambda: json_response([select_fields(row, fields) for row in rows]),
+        headers,
+    )
+
+
+def find_accounts_by_id(ids, fields):
+    """
+    Returns the Accounts with the given IDs in one query
+    The found Accounts are listed in the order asked for, followed by the
+    IDs that do not exist
+    """
+    app.logger.debug("Request to read %s accounts by ID", len(ids))
+    columns = dict.fromkeys(("id",) + fields)
+    rows = Account.project(columns, Account.find_by_ids(ids)).all()
+    return json_response(found_and_missing(ids, rows, fields))
+
+
+def stream_accounts(query, fields, ndjson):
     """
-    app.logger.info("Request to list all accounts")
+    Streams every Account matched by query
+    The rows are read from a server side cursor and written out in chunks
+    as either newline delimited JSON or a single JSON array
+    """
+    app.logger.debug("Streaming all accounts as %s", "NDJSON" if ndjson else "a JSON array")
+    batch_size = app.config["STREAM_BATCH_SIZE"]
+
+    def batches():
+        batch = []
+        for row in Account.stream(batch_size, Account.project(fields, query)):
+            batch.append(json_codec.dumps(row._asdict()))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
 
-    acct_list = [account.serialize() for account in Account.all()]
-    app.logger.info(f"Return a list of {len(acct_list)} Accounts.")
-    return jsonify(acct_list), status.HTTP_200_OK
+    def generate_ndjson():
+        for batch in batches():
+            yield b"\n".join(batch) + b"\n"
+
+    def generate_array():
+        separator = b"["
+        for batch in batches():
+            yield separator + b",".join(batch)
+            separator = b","
+        yield b"]" if separator == b"," else b"[]"
+
+    generate = generate_ndjson if ndjson else generate_array
+    mimetype = NDJSON_MEDIA_TYPE if ndjson else "application/json"
+    return Response(stream_with_context(generate()), status.HTTP_200_OK, mimetype=mimetype)
+
+
+######################################################################
+# READ MANY ACCOUNTS
+######################################################################
+@api.route("/accounts:batchGet", methods=["POST"])
+def read_accounts_batch():
+    """
+    Reads many Accounts
+    This endpoint will return the Accounts whose IDs are in the JSON array
+    that is posted, and list the IDs that were not found
+    """
+    check_content_type("application/json")
+    return find_accounts_by_id(get_batch_ids(), get_fields())
+
+
+######################################################################
+# EXPORT ALL ACCOUNTS
+######################################################################
+@api.route("/accounts/export", methods=["GET"])
+def export_accounts():
+    """
+    Export all Accounts
+    This endpoint will stream every account as CSV (the default) or NDJSON
+    straight from a PostgreSQL COPY without building Account objects
+    """
+    file_format = request.args.get("format", "csv")
+    app.logger.debug("Request to export all accounts as %s", file_format)
+    if file_format not in EXPORT_MEDIA_TYPES:
+        abort(status.HTTP_400_BAD_REQUEST, f"Unsupported export format: {file_format}")
+
+    chunks = Account.export_rows(file_format, app.config["EXPORT_CHUNK_SIZE"])
+    return Response(
+        stream_with_context(chunks),
+        status.HTTP_200_OK,
+        mimetype=EXPORT_MEDIA_TYPES[file_format],
+        headers={"Content-Disposition": f"attachment; filename=accounts.{file_format}"},
+    )
 
 
 ######################################################################
 # READ AN ACCOUNT
 ######################################################################
-@app.route("/accounts/<id>", methods=["GET"])
+@api.route("/accounts/<int:id>", methods=["GET"])
 def read_account(id):
     """
     Read an Account
     This endpoint will read an Account with the given ID
     """
-    app.logger.info(f"Request to read an account with ID {id}")
-    found_account = Account().find(id)
-    if not found_account:
+    app.logger.debug("Request to read an account with ID %s", id)
+    fields = get_fields()
+    values = Account.find_values(id)
+    if not values:
         return f"Account with ID {id} could not be found", status.HTTP_404_NOT_FOUND
 
-    return found_account.serialize(), status.HTTP_200_OK
+    return conditional_response(
+        account_etag(values, fields), lambda: json_response(select_fields(values, fields))
+    )
 
 
 ######################################################################
 # UPDATE AN EXISTING ACCOUNT
 ######################################################################
 
-@app.route("/accounts/<int:id>", methods=["PUT"])
+@api.route("/accounts/<int:id>", methods=["PUT"])
 def update_account(id):
     """
     Update an Account
-    This endpoint will update an Account with the give ID
+    This endpoint will update an Account with the give ID. Send the ETag of
+    the Account in an If-Match header to only update it if it is unchanged.
     """
-    app.logger.info(f"Request to update the account with ID {id}.")
-    account = Account.find(id)
-    if not account:
-        return f"Account with ID {id} is not found", status.HTTP_404_NOT_FOUND
-
+    app.logger.debug("Request to update the account with ID %s.", id)
+    versions = get_if_match_versions(id)
     account = Account().deserialize(request.get_json())
-    account.id = id
-    account.update()
-    return account.serialize(), status.HTTP_200_OK
+    updated = Account.update_by_id(id, account.column_values(), versions)
+    if not updated:
+        return precondition_failed_or_not_found(id, versions)
+
+    return account_response(updated)
+
+
+######################################################################
+# PATCH AN EXISTING ACCOUNT
+######################################################################
+
+@api.route("/accounts/<int:id>", methods=["PATCH"])
+def patch_account(id):
+    """
+    Patch an Account
+    This endpoint will apply a JSON Merge Patch to the Account with the given
+    ID, only writing the fields that are in the patch. If-Match is honored
+    just like it is for PUT.
+    """
+    app.logger.debug("Request to patch the account with ID %s.", id)
+    check_content_type("application/merge-patch+json", "application/json")
+    versions = get_if_match_versions(id)
+    values = Account.patch_values(request.get_json())
+    updated = Account.update_by_id(id, values, versions)
+    if not updated:
+        return precondition_failed_or_not_found(id, versions)
+
+    return account_response(updated)
+
+
+######################################################################
+# PATCH MANY ACCOUNTS
+######################################################################
+@api.route("/accounts:batch", methods=["PATCH"])
+def patch_accounts_batch():
+    """
+    Patches many Accounts
+    This endpoint will apply every item of the posted JSON array, an Account
+    id with an optional version and the JSON Merge Patch fields, in a single
+    transaction and return a result for each item. The version works like
+    If-Match. A patch that would duplicate an email fails the whole batch.
+    """
+    app.logger.debug("Request to patch a batch of Accounts")
+    check_content_type("application/merge-patch+json", "application/json")
+    items = get_batch_items()
+
+    results = [None] * len(items)
+    positions = {}
+    changes = []
+    for position, item in enumerate(items):
+        try:
+            account_id, version, values = get_batch_patch(item)
+        except DataValidationError as error:
+            results[position] = {"status": status.HTTP_400_BAD_REQUEST, "error": str(error)}
+            continue
+        if account_id in positions:
+            error = f"Account with ID {account_id} is patched more than once"
+            results[position] = {"status": status.HTTP_400_BAD_REQUEST, "error": error}
+            continue
+        positions[account_id] = position
+        changes.append((account_id, values, version))
+
+    updated = Account.update_many(changes, app.config["BULK_INSERT_CHUNK_SIZE"])
+    # tell apart the Accounts that were modified from the ones that do not exist
+    unmatched = [change[0] for change in changes if change[0] not in updated]
+    existing = {row.id for row in Account.project(("id",), Account.find_by_ids(unmatched))}
+    for account_id, _, _ in changes:
+        if account_id in updated:
+            account = select_fields(updated[account_id], READABLE_COLUMNS)
+            result = {"status": status.HTTP_200_OK, "account": account}
+        elif account_id in existing:
+            error = f"Account with ID {account_id} was modified"
+            result = {"status": status.HTTP_412_PRECONDITION_FAILED, "error": error}
+        else:
+            error = f"Account with ID {account_id} is not found"
+            result = {"status": status.HTTP_404_NOT_FOUND, "error": error}
+        results[positions[account_id]] = result
+
+    app.logger.debug("Patched %s of %s Accounts", len(updated), len(items))
+    return json_response(results)
 
 
 ######################################################################
 # DELETE AN ACCOUNT
 ######################################################################
 
-@app.route("/accounts/<int:id>", methods=["DELETE"])
+@api.route("/accounts/<int:id>", methods=["DELETE"])
 def delete_account(id):
     """
     Delete an Account
-    This endpoint will delete an Account with the given ID
+    This endpoint will delete an Account with the given ID. Send the ETag of
+    the Account in an If-Match header to only delete it if it is unchanged.
     """
-    app.logger.info(f"Request to delete the account with ID {id}.")
-    account = Account.find(id)
-    if not account:
-        return f"Account with ID {id} is not found", status.HTTP_404_NOT_FOUND
+    app.logger.debug("Request to delete the account with ID %s.", id)
+    versions = get_if_match_versions(id)
+    if not Account.delete_by_id(id, versions):
+        return precondition_failed_or_not_found(id, versions)
 
-    account.delete()
     return "", status.HTTP_204_NO_CONTENT
 
 
+######################################################################
+# DELETE MANY ACCOUNTS
+######################################################################
+@api.route("/accounts:batchDelete", methods=["POST"])
+def delete_accounts_batch():
+    """
+    Deletes many Accounts
+    This endpoint will delete the Accounts whose IDs are in the JSON array
+    that is posted in a single transaction and return a result for each ID
+    """
+    app.logger.debug("Request to delete a batch of Accounts")
+    check_content_type("application/json")
+    ids = get_batch_ids()
+    deleted = Account.delete_many(ids, app.config["BULK_INSERT_CHUNK_SIZE"])
+    results = [
+        {"id": account_id, "status": status.HTTP_204_NO_CONTENT}
+        if account_id in deleted
+        else {"id": account_id, "status": status.HTTP_404_NOT_FOUND}
+        for account_id in ids
+    ]
+    app.logger.debug("Deleted %s of %s Accounts", len(deleted), len(ids))
+    return json_response(results)
+
+
 ######################################################################
 #  U T I L I T Y   F U N C T I O N S
 ######################################################################
-def check_content_type(media_type):
-    """Checks that the media type is correct"""
+def check_content_type(*media_types):
+    """Checks that the media type is one of media_types"""
     content_type = request.headers.get("Content-Type")
-    if content_type and content_type == media_type:
+    if content_type and content_type in media_types:
         return
     app.logger.error("Invalid Content-Type: %s", content_type)
     abort(
         status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
-        f"Content-Type must be {media_type}",
+        f"Content-Type must be {' or '.join(media_types)}",
     )
+
+
+def account_response(account):
+    """Returns an Account with its ETag"""
+    response = json_response(account.as_dict())
+    response.set_etag(account.etag())
+    return response
+
+
+def conditional_response(etag, make_body, headers=None):
+    """
+    Returns 304 Not Modified when the client already holds etag
+
+    The body is only built by calling make_body when it has to be sent.
+    """
+    if request.if_none_match.contains_weak(etag):
+        response = make_response("", status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = make_response(make_body(), status.HTTP_200_OK)
+    response.set_etag(etag)
+    response.headers.extend(headers or {})
+    return response
+
+
+def get_if_match_versions(account_id, if_match=None):
+    """
+    Returns the Account versions allowed by the If-Match header
+
+    None is returned when there is no If-Match header or it is *, and a
+    412 is raised when none of its entity tags belong to the Account.
+    The parsed if_match entity tags are used instead of the request's when
+    they are given.
+    """
+    if_match = request.if_match if if_match is None else if_match
+    if not if_match or if_match.star_tag:
+        return None
+    versions = []
+    for etag in if_match.as_set():
+        tag_id, _, version = etag.partition("-")
+        # a version beyond the integer column can not match
+        if tag_id == str(account_id) and version.isdecimal() and int(version) <= MAX_INTEGER:
+            versions.append(int(version))
+    if not versions:
+        abort(status.HTTP_412_PRECONDITION_FAILED, "If-Match does not match the Account")
+    return versions
+
+
+def precondition_failed_or_not_found(account_id, versions):
+    """Explains why a conditional write to an Account matched no rows"""
+    if versions is not None and Account.find_values(account_id):
+        abort(status.HTTP_412_PRECONDITION_FAILED, f"Account with ID {account_id} was modified")
+    return f"Account with ID {account_id} is not found", status.HTTP_404_NOT_FOUND
+
+
+def get_batch_items():
+    """Returns the JSON array posted to a batch endpoint"""
+    items = request.get_json()
+    if not isinstance(items, list):
+        abort(status.HTTP_400_BAD_REQUEST, "Request body must be a JSON array")
+    if len(items) > app.config["MAX_BATCH_SIZE"]:
+        abort(
+            status.HTTP_400_BAD_REQUEST,
+            f"A batch can hold at most {app.config['MAX_BATCH_SIZE']} items",
+        )
+    return items
+
+
+def get_batch_ids():
+    """Returns the distinct Account IDs in the JSON array posted to a batch endpoint"""
+    ids = get_batch_items()
+    if not all(is_account_id(account_id) for account_id in ids):
+        abort(status.HTTP_400_BAD_REQUEST, "Request body must be a JSON array of Account IDs")
+    return list(dict.fromkeys(ids))
+
+
+def is_account_id(value):
+    """Returns whether a value is an integer in the range of Account IDs"""
+    return isinstance(value, int) and not isinstance(value, bool) and 1 <= value <= MAX_ID
+
+
+def get_batch_patch(item):
+    """Splits an item of a batch patch into its Account ID, version and column values"""
+    if not isinstance(item, dict):
+        raise DataValidationError("Invalid Account: patch must be a non-empty JSON object")
+    patch = dict(item)
+    account_id = patch.pop("id", None)
+    version = patch.pop("version", None)
+    for name, value in (("id", account_id), ("version", version)):
+        if isinstance(value, bool) or not isinstance(value, (int, type(None))):
+            raise DataValidationError(f"Invalid Account: {name} must be an integer")
+    if account_id is None:
+        raise DataValidationError("Invalid Account: id is required")
+    if not is_account_id(account_id):
+        raise DataValidationError(f"Invalid Account: id must be from 1 to {MAX_ID}")
+    return account_id, version, Account.patch_values(patch)
+
+
+def get_account_query(query=None, args=None):
+    """
+    Returns the Account query selected by the filter query parameters
+
+    The filters narrow down query when it is given, which may also be a
+    select() statement, and args is read instead of the request's query
+    parameters when it is given.
+    """
+    args = request.args if args is None else args
+    name = args.get("name")
+    if name:
+        query = Account.find_by_name(name, query)
+    email = args.get("email")
+    if email:
+        query = Account.find_by_email(email, query)
+    joined_after = get_date_arg("joined_after", args)
+    joined_before = get_date_arg("joined_before", args)
+    if joined_after or joined_before:
+        query = Account.find_joined_between(joined_after, joined_before, query)
+    return query
+
+
+def get_date_arg(name, args=None):
+    """Returns the ISO date in the name query parameter, or None"""
+    value = (request.args if args is None else args).get(name)
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        return abort(status.HTTP_400_BAD_REQUEST, f"{name} must be a date like 2020-12-31")
+
+
+def get_id_list(args=None, config=None):
+    """Returns the distinct Account IDs in the comma separated id query parameter"""
+    config = app.config if config is None else config
+    value = (request.args if args is None else args).get("id", "")
+    try:
+        ids = list(dict.fromkeys(int(account_id) for account_id in value.split(",")))
+    except ValueError:
+        ids = None
+    if ids is None or not all(is_account_id(account_id) for account_id in ids):
+        abort(status.HTTP_400_BAD_REQUEST, "id must be a comma separated list of Account IDs")
+    if len(ids) > config["MAX_BATCH_SIZE"]:
+        abort(
+            status.HTTP_400_BAD_REQUEST,
+            f"At most {config['MAX_BATCH_SIZE']} Accounts can be read at once",
+        )
+    return ids
+
+
+def get_fields(args=None):
+    """Returns the Account fields named in the fields query parameter, or all of them"""
+    value = (request.args if args is None else args).get("fields")
+    if not value:
+        return READABLE_COLUMNS
+    fields = tuple(dict.fromkeys(name.strip() for name in value.split(",")))
+    unknown = [name for name in fields if name not in READABLE_COLUMNS]
+    if unknown:
+        abort(
+            status.HTTP_400_BAD_REQUEST,
+            f"Unknown fields {', '.join(unknown)}; choose from {', '.join(READABLE_COLUMNS)}",
+        )
+    return fields
+
+
+def select_fields(values, fields):
+    """Returns the named fields of a row or dictionary of Account values"""
+    if isinstance(values, dict):
+        return {name: values[name] for name in fields}
+    return {name: getattr(values, name) for name in fields}
+
+
+def found_and_missing(ids, rows, fields):
+    """Returns the rows found for ids in the order asked for, and the IDs not found"""
+    found = {row.id: select_fields(row, fields) for row in rows}
+    return {
+        "accounts": [found[account_id] for account_id in ids if account_id in found],
+        "missing": [account_id for account_id in ids if account_id not in found],
+    }
+
+
+def account_etag(values, fields=READABLE_COLUMNS):
+    """Returns the ETag of the fields of an Account found with find_values"""
+    etag = f"{values['id']}-{values['version']}"
+    if fields != READABLE_COLUMNS:
+        etag += ";" + ",".join(fields)
+    return etag
+
+
+def page_etag(rows, fields):
+    """Returns the ETag of a page of Account rows holding their id and version"""
+    etags = ",".join(f"{row.id}-{row.version}" for row in rows)
+    return hashlib.sha1(f"{','.join(fields)};{etags}".encode("utf-8")).hexdigest()
+
+
+def get_page_size(args=None, config=None):
+    """Returns the requested page size bounded by MAX_PAGE_SIZE"""
+    config = app.config if config is None else config
+    limit = (request.args if args is None else args).get("limit")
+    if limit is None:
+        return config["DEFAULT_PAGE_SIZE"]
+    try:
+        limit = int(limit)
+    except ValueError:
+        limit = 0
+    if limit < 1:
+        abort(status.HTTP_400_BAD_REQUEST, "limit must be a positive integer")
+    return min(limit, config["MAX_PAGE_SIZE"])
+
+
+def next_page(rows, limit, args, page_url):
+    """
+    Trims the extra row fetched past a page and links to the next page
+
+    Returns the rows of the page and the Link and X-Next-Cursor headers,
+    where page_url is called with the query parameters of the next page.
+    """
+    headers = {}
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].id)
+        next_args = args.to_dict()
+        next_args.update(limit=limit, cursor=next_cursor)
+        headers["Link"] = f'<{page_url(next_args)}>; rel="next"'
+        headers["X-Next-Cursor"] = next_cursor
+    return rows, headers
+
+
+def encode_cursor(last_id):
+    """Encodes the last ID of a page as an opaque cursor"""
+    payload = json.dumps({"id": last_id}).encode("utf-8")
+    return base64.urlsafe_b64encode(payload).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(cursor):
+    """Decodes an opaque cursor back into the last ID of the previous page"""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        last_id = json.loads(base64.urlsafe_b64decode(padded))["id"]
+        if is_account_id(last_id):
+            return last_id
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        pass
+    return abort(status.HTTP_400_BAD_REQUEST, f"Invalid cursor: {cursor}")
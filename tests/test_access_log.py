@@ -0,0 +1,74 @@
+"""
+Test cases for the Request Access Log
+"""
+import json
+import logging
+from unittest.mock import patch
+from service.common.log_handlers import JsonFormatter
+from tests.base import DatabaseTestCase, app
+
+
+######################################################################
+#  A C C E S S   L O G   T E S T   C A S E S
+######################################################################
+class TestAccessLog(DatabaseTestCase):
+    """Test Cases for the Request Access Log"""
+
+    def tearDown(self):
+        """Runs once after each test case"""
+        super().tearDown()
+        app.config["ACCESS_LOG_SAMPLE_RATE"] = 1.0
+        app.config["SLOW_REQUEST_THRESHOLD_MS"] = 1000
+
+    def test_access_log(self):
+        """It should log one JSON line per request"""
+        with self.assertLogs(app.logger, logging.INFO) as logs:
+            response = self.client.get("/accounts")
+        entry = logs.records[-1].fields
+        self.assertEqual(entry["event"], "request")
+        self.assertEqual(entry["method"], "GET")
+        self.assertEqual(entry["route"], "/accounts")
+        self.assertEqual(entry["status"], 200)
+        self.assertEqual(entry["db_queries"], 1)
+        self.assertEqual(entry["bytes_out"], len(response.data))
+        self.assertEqual(entry["request_id"], response.headers["X-Request-ID"])
+
+    def test_json_line(self):
+        """It should write the fields as keys of a single JSON line"""
+        with self.assertLogs(app.logger, logging.INFO) as logs:
+            self.client.get("/accounts")
+        entry = json.loads(JsonFormatter().format(logs.records[-1]))
+        self.assertEqual(entry["message"], "GET /accounts 200")
+        self.assertEqual(entry["event"], "request")
+        self.assertEqual(entry["status"], 200)
+        self.assertEqual(entry["level"], "INFO")
+
+    def test_request_id(self):
+        """It should reuse a valid request id and replace an invalid one"""
+        response = self.client.get("/", headers={"X-Request-ID": "abc-123"})
+        self.assertEqual(response.headers["X-Request-ID"], "abc-123")
+        response = self.client.get("/", headers={"X-Request-ID": "not a valid id!"})
+        self.assertEqual(len(response.headers["X-Request-ID"]), 32)
+
+    def test_sampling(self):
+        """It should sample successful requests but always log errors"""
+        app.config["ACCESS_LOG_SAMPLE_RATE"] = 0
+        with patch.object(app.logger, "info") as info_mock:
+            self.client.get("/accounts")
+        info_mock.assert_not_called()
+
+        with self.assertLogs(app.logger, logging.WARNING) as logs:
+            self.client.get("/accounts/0")
+        entry = logs.records[-1].fields
+        self.assertEqual(entry["status"], 404)
+        self.assertEqual(entry["route"], "/accounts/<int:id>")
+
+    def test_slow_request(self):
+        """It should always log requests slower than the threshold"""
+        app.config["ACCESS_LOG_SAMPLE_RATE"] = 0
+        app.config["SLOW_REQUEST_THRESHOLD_MS"] = 0
+        with self.assertLogs(app.logger, logging.WARNING) as logs:
+            self.client.get("/")
+        entry = logs.records[-1].fields
+        self.assertEqual(entry["route"], "/")
+        self.assertEqual(entry["status"], 200)
@@ -0,0 +1,154 @@
+"""
+Test cases for the Cache Backends
+"""
+import socketserver
+import threading
+import time
+from unittest import TestCase
+from unittest.mock import patch
+from service.common.cache import LRUCache, NullCache, RedisCache, create_cache
+
+
+class FakeRedisHandler(socketserver.StreamRequestHandler):
+    """Answers GET, SET, DEL and SELECT like a Redis server would"""
+
+    def handle(self):
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            args = []
+            for _ in range(int(line[1:])):
+                length = int(self.rfile.readline()[1:])
+                args.append(self.rfile.read(length + 2)[:-2].decode("utf-8"))
+            self.wfile.write(self.server.execute(args))
+
+
+class FakeRedisServer(socketserver.ThreadingTCPServer):
+    """An in-memory stand in for Redis"""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), FakeRedisHandler)
+        self.data = {}
+        self.commands = []
+
+    def execute(self, args):
+        """Runs one command and returns the encoded reply"""
+        self.commands.append(args)
+        command = args[0].upper()
+        if command == "GET":
+            value = self.data.get(args[1])
+            if value is None:
+                return b"$-1\r\n"
+            return f"${len(value.encode())}\r\n{value}\r\n".encode()
+        if command == "SET":
+            self.data[args[1]] = args[2]
+            return b"+OK\r\n"
+        if command == "DEL":
+            deleted = sum(self.data.pop(key, None) is not None for key in args[1:])
+            return f":{deleted}\r\n".encode()
+        if command == "SELECT":
+            return b"+OK\r\n"
+        return b"-ERR unknown command\r\n"
+
+
+######################################################################
+#  C A C H E   T E S T   C A S E S
+######################################################################
+class TestCache(TestCase):
+    """Test Cases for the Cache Backends"""
+
+    def test_create_cache(self):
+        """It should create the configured cache backend"""
+        config = {"CACHE_TTL": 5, "CACHE_MAX_SIZE": 2, "CACHE_REDIS_URL": "redis://cache:6380/1"}
+        self.assertIsInstance(create_cache(config), NullCache)
+        cache = create_cache(dict(config, CACHE_BACKEND="memory"))
+        self.assertIsInstance(cache, LRUCache)
+        self.assertEqual(cache.max_size, 2)
+        cache = create_cache(dict(config, CACHE_BACKEND="redis"))
+        self.assertIsInstance(cache, RedisCache)
+        self.assertEqual((cache.host, cache.port, cache.database), ("cache", 6380, "1"))
+
+    def test_null_cache(self):
+        """It should never return a value from the null cache"""
+        cache = NullCache()
+        cache.set("key", {"id": 1})
+        self.assertIsNone(cache.get("key"))
+        cache.delete("key")
+        self.assertEqual(cache.stats(), {"hits": 0, "misses": 1})
+
+    def test_lru_cache(self):
+        """It should evict the least recently used entry"""
+        cache = LRUCache(max_size=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        self.assertEqual(cache.get("a"), 1)
+        cache.set("c", 3)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), 3)
+        cache.delete("c", "missing")
+        self.assertIsNone(cache.get("c"))
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.stats(), {"hits": 2, "misses": 2})
+
+    def test_lru_cache_expires(self):
+        """It should not return entries older than the TTL"""
+        cache = LRUCache(max_size=2, ttl=0.01)
+        cache.set("a", 1)
+        time.sleep(0.02)
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(len(cache), 0)
+
+    def test_redis_cache(self):
+        """It should get, set and delete values in Redis"""
+        server = FakeRedisServer()
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            host, port = server.server_address
+            cache = RedisCache(f"redis://{host}:{port}/2", ttl=30)
+            self.assertIsNone(cache.get("account:1"))
+            cache.set("account:1", {"id": 1, "name": "Zoë"})
+            self.assertEqual(cache.get("account:1"), {"id": 1, "name": "Zoë"})
+            cache.set("account:2", {"id": 2})
+            cache.delete("account:1", "account:2")
+            self.assertIsNone(cache.get("account:1"))
+            self.assertIsNone(cache.get("account:2"))
+            self.assertEqual(cache.stats(), {"hits": 1, "misses": 3})
+            self.assertIn(["DEL", "account:1", "account:2"], server.commands)
+            self.assertEqual(server.commands[0], ["SELECT", "2"])
+            self.assertIn(["SET", "account:1", '{"id": 1, "name": "Zo\\u00eb"}', "EX", "30"], server.commands)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_redis_cache_unavailable(self):
+        """It should treat an unreachable Redis as a cache miss"""
+        server = FakeRedisServer()
+        host, port = server.server_address
+        server.server_close()
+        cache = RedisCache(f"redis://{host}:{port}")
+        cache.set("account:1", {"id": 1})
+        self.assertIsNone(cache.get("account:1"))
+        cache.delete("account:1")
+        self.assertEqual(cache.stats(), {"hits": 0, "misses": 1})
+
+    def test_redis_cache_ejected(self):
+        """It should skip Redis for reads after a failure until the eject time is over"""
+        server = FakeRedisServer()
+        host, port = server.server_address
+        server.server_close()
+        cache = RedisCache(f"redis://{host}:{port}", eject_seconds=60)
+        with patch.object(cache, "_connect", wraps=cache._connect) as connect_mock:  # pylint: disable=protected-access
+            self.assertIsNone(cache.get("account:1"))
+            self.assertTrue(cache.is_ejected())
+            self.assertIsNone(cache.get("account:1"))
+            cache.set("account:1", {"id": 1})
+            self.assertEqual(connect_mock.call_count, 1)
+            # deletes are still sent so writes invalidate the cache
+            cache.delete("account:1")
+            self.assertEqual(connect_mock.call_count, 2)
+
+        with patch("service.common.cache.time.monotonic", return_value=time.monotonic() + 61):
+            self.assertFalse(cache.is_ejected())
@@ -2,10 +2,15 @@
 CLI Command Extensions for Flask
 """
 import os
+import tempfile
+from datetime import datetime, timezone
 from unittest import TestCase
 from unittest.mock import patch, MagicMock
 from click.testing import CliRunner
-from service.common.cli_commands import db_create
+from service.common.cli_commands import (
+    db_init, db_migrate, db_status, db_create, accounts_import, accounts_export
+)
+from service.common.migrations import Migration
 
 
 class TestFlaskCLI(TestCase):
@@ -14,10 +19,89 @@ class TestFlaskCLI(TestCase):
     def setUp(self):
         self.runner = CliRunner()
 
+    @patch('service.common.cli_commands.db')
+    def test_db_init(self, db_mock):
+        """It should call the db-init command"""
+        with patch.dict(os.environ, {"FLASK_APP": "service"}, clear=True):
+            result = self.runner.invoke(db_init)
+            self.assertEqual(result.exit_code, 0)
+        db_mock.create_all.assert_called_once()
+        db_mock.drop_all.assert_not_called()
+
+    @patch('service.common.cli_commands.Migrator')
+    @patch('service.common.cli_commands.db')
+    def test_db_migrate(self, db_mock, migrator_mock):
+        """It should call the db-migrate command"""
+        migration = Migration(1, "Add a column", None)
+        migrator_mock.return_value.migrate.return_value = [(migration, 0.5)]
+        with patch.dict(os.environ, {"FLASK_APP": "service"}, clear=True):
+            result = self.runner.invoke(db_migrate, ["--target", "1", "--lock-timeout", "100"])
+            self.assertEqual(result.exit_code, 0)
+        self.assertEqual(migrator_mock.call_args[0][0], db_mock.engine)
+        self.assertEqual(migrator_mock.call_args[1]["lock_timeout_ms"], 100)
+        migrator_mock.return_value.migrate.assert_called_once_with(1)
+        self.assertIn("Applied 1: Add a column in 0.5s", result.output)
+
+    @patch('service.common.cli_commands.Migrator')
+    @patch('service.common.cli_commands.db')
+    def test_db_status(self, _db_mock, migrator_mock):
+        """It should call the db-status command"""
+        migrator_mock.return_value.status.return_value = [
+            (Migration(1, "Add a column", None), datetime(2022, 1, 31, tzinfo=timezone.utc)),
+            (Migration(2, "Add an index", None), None),
+        ]
+        with patch.dict(os.environ, {"FLASK_APP": "service"}, clear=True):
+            result = self.runner.invoke(db_status)
+            self.assertEqual(result.exit_code, 0)
+        self.assertIn("2022-01-31 00:00:00+00:00", result.output)
+        self.assertIn("pending", result.output)
+
     @patch('service.common.cli_commands.db')
     def test_db_create(self, db_mock):
         """It should call the db-create command"""
         db_mock.return_value = MagicMock()
-        with patch.dict(os.environ, {"FLASK_APP": "service:app"}, clear=True):
+        with patch.dict(os.environ, {"FLASK_APP": "service"}, clear=True):
             result = self.runner.invoke(db_create)
             self.assertEqual(result.exit_code, 0)
+
+    @patch('service.common.cli_commands.Account')
+    def test_accounts_import_csv(self, account_mock):
+        """It should call the accounts-import command with a CSV file"""
+        account_mock.import_rows.return_value = [(2, 1), (1, 1)]
+        with tempfile.TemporaryDirectory() as folder:
+            filename = os.path.join(folder, "accounts.csv")
+            with open(filename, "w", encoding="utf-8") as csv_file:
+                csv_file.write("name,email,address\nA,a@x.com,1 Way\nB,a@x.com,2 Way\nC,c@x.com,3 Way\n")
+            with patch.dict(os.environ, {"FLASK_APP": "service"}, clear=True):
+                result = self.runner.invoke(accounts_import, [filename, "--batch-size", "2"])
+            self.assertEqual(result.exit_code, 0)
+            rows, batch_size = account_mock.import_rows.call_args[0]
+            self.assertEqual(batch_size, 2)
+        self.assertIn("Imported 2 Accounts, skipped 1", result.output)
+
+    @patch('service.common.cli_commands.Account')
+    def test_accounts_import_ndjson(self, account_mock):
+        """It should call the accounts-import command with an NDJSON file"""
+        account_mock.import_rows.side_effect = lambda rows, _: [(len(list(rows)), 1)]
+        with tempfile.TemporaryDirectory() as folder:
+            filename = os.path.join(folder, "accounts.json")
+            with open(filename, "w", encoding="utf-8") as json_file:
+                json_file.write('{"name": "A", "email": "a@x.com", "address": "1 Way"}\n\n')
+                json_file.write('{"name": "B", "email": \n[1, 2]\n')
+            with patch.dict(os.environ, {"FLASK_APP": "service"}, clear=True):
+                result = self.runner.invoke(accounts_import, [filename])
+            self.assertEqual(result.exit_code, 0)
+        self.assertIn("Imported 1 Accounts, skipped 2", result.output)
+
+    @patch('service.common.cli_commands.Account')
+    def test_accounts_export(self, account_mock):
+        """It should call the accounts-export command"""
+        account_mock.export_rows.return_value = [b"id,name\n", b"1,A\n"]
+        with tempfile.TemporaryDirectory() as folder:
+            filename = os.path.join(folder, "accounts.csv")
+            with patch.dict(os.environ, {"FLASK_APP": "service"}, clear=True):
+                result = self.runner.invoke(accounts_export, ["--output", filename, "--chunk-size", "10"])
+            self.assertEqual(result.exit_code, 0)
+            with open(filename, "rb") as csv_file:
+                self.assertEqual(csv_file.read(), b"id,name\n1,A\n")
+        account_mock.export_rows.assert_called_once_with("csv", 10)
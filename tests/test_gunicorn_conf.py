@@ -0,0 +1,84 @@
+"""
+Test cases for the Gunicorn Configuration
+"""
+import os
+import tempfile
+import importlib.util
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "gunicorn.conf.py")
+
+
+def load_config(**env):
+    """Loads the gunicorn settings with only the given environment variables"""
+    spec = importlib.util.spec_from_file_location("gunicorn_conf", CONFIG_PATH)
+    module = importlib.util.module_from_spec(spec)
+    with patch.dict(os.environ, env, clear=True):
+        spec.loader.exec_module(module)
+    return module
+
+
+def write(path, text):
+    """Writes text to a new file"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="ascii") as file:
+        file.write(text)
+
+
+######################################################################
+#  G U N I C O R N   C O N F I G   T E S T   C A S E S
+######################################################################
+class TestGunicornConf(TestCase):
+    """Test Cases for the Gunicorn Configuration"""
+
+    def test_settings(self):
+        """It should read its settings from the environment"""
+        conf = load_config(
+            PORT="9000", GUNICORN_WORKERS="3", GUNICORN_WORKER_CLASS="sync",
+            GUNICORN_PRELOAD="false", GUNICORN_MAX_REQUESTS="0", PROMETHEUS_MULTIPROC_DIR="/tmp",
+        )
+        self.assertEqual(conf.bind, "0.0.0.0:9000")
+        self.assertEqual(conf.workers, 3)
+        self.assertEqual(conf.worker_class, "sync")
+        self.assertFalse(conf.preload_app)
+        self.assertEqual(conf.max_requests, 0)
+
+        conf = load_config(PROMETHEUS_MULTIPROC_DIR="/tmp")
+        self.assertEqual(conf.worker_class, "gthread")
+        self.assertEqual(conf.workers, conf.cpu_limit())
+        self.assertTrue(conf.preload_app)
+
+    def test_cpu_limit(self):
+        """It should use the cgroup CPU quota when there is one"""
+        conf = load_config(GUNICORN_WORKERS="1")
+        with tempfile.TemporaryDirectory() as root:
+            write(os.path.join(root, "cpu.max"), "150000 100000\n")
+            self.assertEqual(conf.cpu_limit(root), 2)
+            write(os.path.join(root, "cpu.max"), "max 100000\n")
+            self.assertEqual(conf.cpu_limit(root), conf.cpu_limit(os.path.join(root, "none")))
+        with tempfile.TemporaryDirectory() as root:
+            write(os.path.join(root, "cpu", "cpu.cfs_quota_us"), "50000\n")
+            write(os.path.join(root, "cpu", "cpu.cfs_period_us"), "100000\n")
+            self.assertEqual(conf.cpu_limit(root), 1)
+
+    def test_post_fork(self):
+        """It should give a worker its own connections and log thread"""
+        conf = load_config(GUNICORN_WORKERS="1")
+        app = MagicMock()
+        with patch("service.models.dispose_after_fork") as dispose_mock, \
+                patch("service.common.log_handlers.restart_logging") as restart_mock:
+            conf.post_fork(MagicMock(app=MagicMock(callable=None)), MagicMock())
+            dispose_mock.assert_not_called()
+            conf.post_fork(MagicMock(app=MagicMock(callable=app)), MagicMock())
+        dispose_mock.assert_called_once_with(app)
+        restart_mock.assert_called_once_with(app)
+
+    def test_child_exit(self):
+        """It should drop the live gauges of a worker that exited"""
+        conf = load_config(GUNICORN_WORKERS="1")
+        worker = MagicMock(pid=1234)
+        with patch("prometheus_client.multiprocess.mark_process_dead") as mark_mock:
+            with patch.dict(os.environ, {"PROMETHEUS_MULTIPROC_DIR": "/tmp"}):
+                conf.child_exit(MagicMock(), worker)
+        mark_mock.assert_called_once_with(1234)
@@ -0,0 +1,50 @@
+"""
+Test cases for the JSON Codec
+"""
+import json
+from datetime import date
+from unittest import TestCase
+from unittest.mock import patch
+from flask import Flask, jsonify
+from service.common import json_codec
+from service.common.json_codec import OrjsonEncoder, dumps, init_json, json_response
+
+
+######################################################################
+#  J S O N   C O D E C   T E S T   C A S E S
+######################################################################
+class TestJsonCodec(TestCase):
+    """Test Cases for the JSON Codec"""
+
+    def test_dumps(self):
+        """It should encode dates natively"""
+        data = {"name": "Zoë", "date_joined": date(2022, 1, 31)}
+        expected = '{"name":"Zoë","date_joined":"2022-01-31"}'.encode("utf-8")
+        self.assertEqual(dumps(data), expected)
+        with patch.object(json_codec, "orjson", None):
+            self.assertEqual(dumps(data), expected)
+            self.assertRaises(TypeError, dumps, {"value": object()})
+
+    def test_json_response(self):
+        """It should return a JSON response"""
+        response = json_response([1, 2], 201, {"X-Test": "yes"})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.mimetype, "application/json")
+        self.assertEqual(response.headers["X-Test"], "yes")
+        self.assertEqual(response.get_data(), b"[1,2]")
+
+    def test_orjson_encoder(self):
+        """It should make jsonify use orjson"""
+        app = Flask("test_json")
+        init_json(app)
+        self.assertIs(app.json_encoder, OrjsonEncoder)
+        with app.app_context():
+            response = jsonify(b=1, a=date(2022, 1, 31))
+            self.assertEqual(response.get_data(), b'{"a":"2022-01-31","b":1}\n')
+            app.config["JSONIFY_PRETTYPRINT_REGULAR"] = True
+            self.assertEqual(jsonify([1]).get_data(), b"[\n  1\n]\n")
+
+    def test_orjson_encoder_fallback(self):
+        """It should leave what orjson cannot encode to the standard encoder"""
+        data = {"big": 2 ** 70, 1: "one"}
+        self.assertEqual(json.loads(OrjsonEncoder().encode(data)), {"big": 2 ** 70, "1": "one"})
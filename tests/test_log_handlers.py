@@ -0,0 +1,150 @@
+"""
+Test cases for the Log Handlers
+"""
+import atexit
+import io
+import json
+import logging
+import queue
+from unittest import TestCase
+from unittest.mock import patch
+from flask import Flask
+from service.common.log_handlers import (
+    MODULE_LOGGER, DroppingQueueHandler, JsonFormatter, SamplingFilter, TextFormatter,
+    init_logging, restart_logging,
+)
+
+
+def stop_listener(app):
+    """Stops the log listener of app so its records are written"""
+    listener = app.extensions["log_listener"]
+    listener.stop()
+    atexit.unregister(listener.stop)
+
+
+def make_record(level=logging.INFO, message="hello %s", args=("world",)):
+    """Creates a log record"""
+    return logging.LogRecord("test", level, __file__, 1, message, args, None)
+
+
+######################################################################
+#  L O G   H A N D L E R   T E S T   C A S E S
+######################################################################
+class TestLogHandlers(TestCase):
+    """Test Cases for the Log Handlers"""
+
+    def test_init_logging(self):
+        """It should write app logs through the queue as JSON"""
+        stream = io.StringIO()
+        server_logger = logging.getLogger("test.server")
+        server_logger.handlers = [logging.StreamHandler(stream)]
+        server_logger.setLevel(logging.INFO)
+        app = Flask("test_app")
+        init_logging(app, "test.server")
+        self.assertIsInstance(app.logger.handlers[0], DroppingQueueHandler)
+
+        app.logger.info("Account %s created", 42)
+        stop_listener(app)
+        lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+        self.assertEqual(lines[0]["message"], "Logging handler established")
+        self.assertEqual(lines[1]["message"], "Account 42 created")
+        self.assertEqual(lines[1]["level"], "INFO")
+
+    def test_init_logging_without_gunicorn(self):
+        """It should write app and module logs to stderr when gunicorn has no handlers"""
+        stream = io.StringIO()
+        logging.getLogger("test.server.none").handlers = []
+        app = Flask("test_app_none")
+        with patch("sys.stderr", stream):
+            init_logging(app, "test.server.none")
+        app.logger.error("Account %s failed", 42)
+        logging.getLogger(MODULE_LOGGER).warning("Cache is down")
+        stop_listener(app)
+        messages = [json.loads(line)["message"] for line in stream.getvalue().splitlines()]
+        self.assertEqual(messages, ["Account 42 failed", "Cache is down"])
+
+    def test_init_logging_again(self):
+        """It should stop the listener of the app set up before"""
+        server_logger = logging.getLogger("test.server.again")
+        server_logger.handlers = [logging.StreamHandler(io.StringIO())]
+        first_app = Flask("test_app_first")
+        init_logging(first_app, "test.server.again")
+        first_listener = first_app.extensions["log_listener"]
+        second_app = Flask("test_app_second")
+        init_logging(second_app, "test.server.again")
+        self.assertIsNone(first_listener._thread)  # pylint: disable=protected-access
+        self.assertIsNotNone(second_app.extensions["log_listener"]._thread)  # pylint: disable=protected-access
+        stop_listener(second_app)
+
+    def test_init_logging_text(self):
+        """It should write app logs as text when asked to"""
+        stream = io.StringIO()
+        server_logger = logging.getLogger("test.server.text")
+        server_logger.handlers = [logging.StreamHandler(stream)]
+        server_logger.setLevel(logging.INFO)
+        app = Flask("test_app_text")
+        app.config["LOG_FORMAT"] = "text"
+        init_logging(app, "test.server.text")
+        stop_listener(app)
+        self.assertIn("[INFO] [log_handlers] Logging handler established", stream.getvalue())
+
+    def test_restart_logging(self):
+        """It should write app logs through a new listener after a fork"""
+        stream = io.StringIO()
+        server_logger = logging.getLogger("test.server.fork")
+        server_logger.handlers = [logging.StreamHandler(stream)]
+        server_logger.setLevel(logging.INFO)
+        app = Flask("test_app_fork")
+        init_logging(app, "test.server.fork")
+        old_listener = app.extensions["log_listener"]
+        stop_listener(app)
+
+        restart_logging(app)
+        self.assertIsNot(app.extensions["log_listener"], old_listener)
+        app.logger.info("After the fork")
+        stop_listener(app)
+        self.assertEqual(json.loads(stream.getvalue().splitlines()[-1])["message"], "After the fork")
+
+    def test_queue_full(self):
+        """It should drop records instead of blocking when the queue is full"""
+        handler = DroppingQueueHandler(queue.Queue(1))
+        handler.handle(make_record())
+        handler.handle(make_record())
+        self.assertEqual(handler.queue.qsize(), 1)
+        self.assertEqual(handler.dropped, 1)
+        # records are formatted later by the listener
+        self.assertEqual(handler.queue.get().args, ("world",))
+
+    def test_sampling_filter(self):
+        """It should sample INFO records of hot routes only"""
+        app = Flask("test_sampling")
+        app.add_url_rule("/hot", "hot", lambda: "")
+        app.add_url_rule("/cold", "cold", lambda: "")
+        log_filter = SamplingFilter(0, ["/hot"])
+        self.assertTrue(log_filter.filter(make_record()))
+        with app.test_request_context("/hot"):
+            self.assertFalse(log_filter.filter(make_record()))
+            self.assertTrue(log_filter.filter(make_record(logging.WARNING)))
+        with app.test_request_context("/cold"):
+            self.assertTrue(log_filter.filter(make_record()))
+        with app.test_request_context("/hot"):
+            self.assertTrue(SamplingFilter(1, ["/hot"]).filter(make_record()))
+
+    def test_json_formatter(self):
+        """It should format records and exceptions as JSON"""
+        try:
+            raise ValueError("boom")
+        except ValueError as error:
+            record = logging.LogRecord("test", logging.ERROR, __file__, 1, "failed", (), (ValueError, error, None))
+        entry = json.loads(JsonFormatter().format(record))
+        self.assertEqual(entry["message"], "failed")
+        self.assertEqual(entry["level"], "ERROR")
+        self.assertIn("ValueError: boom", entry["exception"])
+
+    def test_text_formatter_fields(self):
+        """It should append the fields of a record to the text line"""
+        record = make_record(message="%s %s %s", args=("GET", "/accounts", 200))
+        record.fields = {"event": "request", "status": 200, "user_agent": "curl 8.0"}
+        line = TextFormatter("%(levelname)s %(message)s").format(record)
+        self.assertEqual(line, 'INFO GET /accounts 200 event=request status=200 user_agent="curl 8.0"')
+        self.assertEqual(TextFormatter("%(message)s").format(make_record()), "hello world")
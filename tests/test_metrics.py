@@ -0,0 +1,59 @@
+"""
+Test cases for the Prometheus Metrics
+"""
+from service.common import status
+from service.models import db
+from tests.base import DatabaseTestCase
+from tests.factories import AccountFactory
+
+
+######################################################################
+#  M E T R I C S   T E S T   C A S E S
+######################################################################
+class TestMetrics(DatabaseTestCase):
+    """Test Cases for the Prometheus Metrics"""
+
+    def test_metrics(self):
+        """It should expose request, database and pool metrics"""
+        account = AccountFactory()
+        response = self.client.post("/accounts", json=account.serialize())
+        new_id = response.get_json()["id"]
+        self.client.get(f"/accounts/{new_id}")
+        self.client.get("/no/such/page")
+
+        response = self.client.get("/metrics")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        text = response.get_data(as_text=True)
+        self.assertIn('http_requests_total{method="GET",route="/accounts/<int:id>",status="200"}', text)
+        self.assertIn('http_requests_total{method="GET",route="<unmatched>",status="404"}', text)
+        self.assertIn('http_request_duration_seconds_bucket{le="0.005",method="POST",route="/accounts"', text)
+        self.assertIn("http_requests_in_flight 1.0", text)
+        self.assertIn('http_request_db_queries_count{route="/accounts"}', text)
+        self.assertIn("db_pool_checkouts_total ", text)
+        self.assertIn("db_pool_max_wait_seconds ", text)
+        self.assertIn("cache_misses_total ", text)
+
+    def test_pool_counters(self):
+        """It should count pool checkouts across requests without double counting"""
+        self.client.get("/accounts")
+        before = self._sample("db_pool_checkouts_total")
+        for _ in range(2):
+            db.session.remove()  # the pushed app context would keep the connection
+            self.client.get("/accounts")
+        after = self._sample("db_pool_checkouts_total")
+        self.assertGreaterEqual(after - before, 2)
+        self.assertEqual(self._sample("db_pool_checkouts_total"), after)
+
+    def test_db_queries_per_request(self):
+        """It should count the database queries of each request"""
+        self.client.get("/accounts")
+        before = self._sample('http_request_db_queries_sum{route="/accounts"}')
+        self.client.get("/accounts")
+        after = self._sample('http_request_db_queries_sum{route="/accounts"}')
+        self.assertGreaterEqual(after - before, 1)
+
+    def _sample(self, name):
+        for line in self.client.get("/metrics").get_data(as_text=True).splitlines():
+            if line.startswith(name + " "):
+                return float(line.split()[-1])
+        return 0.0
@@ -0,0 +1,56 @@
+"""
+Test cases for the Connection Pool Statistics
+"""
+from unittest import TestCase
+from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import NullPool
+from service.common.pool_stats import InstrumentedQueuePool, pool_status
+
+
+class TestPoolStats(TestCase):
+    """Test Cases for the Connection Pool Statistics"""
+
+    def setUp(self):
+        self.engine = create_engine(
+            "sqlite://", poolclass=InstrumentedQueuePool,
+            pool_size=1, max_overflow=1, pool_timeout=0.01,
+        )
+
+    def tearDown(self):
+        self.engine.dispose()
+
+    def test_pool_status(self):
+        """It should report the pool usage gauges"""
+        first = self.engine.connect()
+        status = pool_status(self.engine)
+        self.assertEqual(status["pool"], "InstrumentedQueuePool")
+        self.assertEqual(status["size"], 1)
+        self.assertEqual(status["max_overflow"], 1)
+        self.assertEqual(status["in_use"], 1)
+        self.assertEqual(status["overflow"], 0)
+
+        second = self.engine.connect()
+        status = pool_status(self.engine)
+        self.assertEqual(status["in_use"], 2)
+        self.assertEqual(status["overflow"], 1)
+        self.assertEqual(status["checkouts"], 2)
+        second.close()
+        first.close()
+        self.assertEqual(pool_status(self.engine)["in_use"], 0)
+
+    def test_checkout_timeout(self):
+        """It should count checkouts that time out"""
+        connections = [self.engine.connect(), self.engine.connect()]
+        self.assertRaises(PoolTimeoutError, self.engine.connect)
+        status = pool_status(self.engine)
+        self.assertEqual(status["timeouts"], 1)
+        self.assertEqual(status["checkouts"], 3)
+        self.assertGreater(status["max_wait_seconds"], 0)
+        for connection in connections:
+            connection.close()
+
+    def test_other_pools(self):
+        """It should only report the class of pools that are not queues"""
+        engine = create_engine("sqlite://", poolclass=NullPool)
+        self.assertEqual(pool_status(engine), {"pool": "NullPool"})
@@ -0,0 +1,63 @@
+"""
+Test cases for SQL Query Timing
+"""
+import copy
+import json
+import logging
+from unittest.mock import patch
+from sqlalchemy import text
+from sqlalchemy.exc import ProgrammingError
+from service.common.log_handlers import JsonFormatter
+from service.models import db
+from tests.base import DatabaseTestCase, app
+
+
+######################################################################
+#  Q U E R Y   L O G   T E S T   C A S E S
+######################################################################
+class TestQueryLog(DatabaseTestCase):
+    """Test Cases for SQL Query Timing"""
+
+    def tearDown(self):
+        """Runs once after each test case"""
+        super().tearDown()
+        app.config["QUERY_COUNT_HEADER"] = False
+        app.config["SLOW_QUERY_THRESHOLD_MS"] = 200
+
+    def test_query_count_header(self):
+        """It should report the query count of a request when enabled"""
+        response = self.client.get("/accounts")
+        self.assertNotIn("X-DB-Query-Count", response.headers)
+
+        app.config["QUERY_COUNT_HEADER"] = True
+        response = self.client.get("/accounts")
+        self.assertEqual(response.headers["X-DB-Query-Count"], "1")
+        self.assertIn("X-DB-Query-Time-Ms", response.headers)
+
+    def test_failed_statement(self):
+        """It should leave nothing on the pooled connection when a statement fails"""
+        with db.engine.connect() as connection:
+            info = copy.deepcopy(dict(connection.connection.info))
+            for _ in range(3):
+                self.assertRaises(ProgrammingError, connection.execute, text("SELECT * FROM nowhere"))
+            self.assertEqual(dict(connection.connection.info), info)
+
+    def test_slow_query_log(self):
+        """It should log the statements slower than the threshold"""
+        app.config["SLOW_QUERY_THRESHOLD_MS"] = 0
+        with self.assertLogs(app.logger, logging.WARNING) as logs:
+            self.client.get("/accounts", query_string={"name": "nobody"})
+        entry = json.loads(JsonFormatter().format(logs.records[-1]))
+        self.assertTrue(entry["message"].startswith("Slow query of "))
+        self.assertEqual(entry["event"], "slow_query")
+        self.assertEqual(entry["route"], "/accounts")
+        self.assertEqual(entry["method"], "GET")
+        self.assertEqual(entry["rows"], 0)
+        self.assertIn("FROM account", entry["statement"])
+
+    def test_no_threshold(self):
+        """It should not log statements when there is no threshold"""
+        app.config["SLOW_QUERY_THRESHOLD_MS"] = None
+        with patch.object(app.logger, "warning") as warning_mock:
+            self.client.get("/accounts")
+        warning_mock.assert_not_called()